@@ -1,26 +1,31 @@
+import asyncio
 from datetime import datetime
 import logging
 import time
 
-import aiohttp
-
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.entity_platform import async_get_platforms
-from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.helpers import device_registry as dr
 
 # from homeassistant.config_entries import async_unload_platforms
 from homeassistant.util import dt as dt_util
 
 from . import state  # ✅ import the whole
+from .broadcast import OUTCOME_DELIVERED, async_post_to_hosts
+from .connection import async_close_connections
 from .const import DOMAIN
-from .discovery import get_discovered_devices
+from .coordinator import RefreshBatcher
+from .discovery import async_forget_device, get_device_index, get_discovered_devices
+from .media import async_relay_media, async_setup_media, async_unload_media
+from .outbox import async_setup_outbox, async_unload_outbox, get_outbox
+from .push import async_setup_push, async_unload_push
 from .TimerlyDevice import TimerlyDevice
 
 _LOGGER = logging.getLogger(__name__)
 
 # PLATFORMS = ["binary_sensor", "button"]
-PLATFORMS = ["binary_sensor", "select"]
+PLATFORMS = ["binary_sensor", "select", "sensor"]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -31,172 +36,306 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data[DOMAIN]["entry"] = entry
     state.hass_ref = hass
 
+    async_setup_push(hass, entry)
+    await async_setup_outbox(hass, entry)
+    async_setup_media(hass, entry)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    async def _async_close_connections(event: Event) -> None:
+        # Entries are not unloaded on shutdown; close the device sessions here
+        await async_close_connections(hass)
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_connections)
+    )
+
     # Then forward to platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 
+async def async_remove_config_entry_device(
+    hass: HomeAssistant, entry: ConfigEntry, device_entry: dr.DeviceEntry
+) -> bool:
+    """Let the user delete a TV that is gone for good from the device page."""
+    for domain, name in device_entry.identifiers:
+        if domain == DOMAIN:
+            async_forget_device(hass, name)
+    return True
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    async_unload_push(hass)
+    async_unload_media(hass)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        await async_unload_outbox(hass)
+        await async_close_connections(hass)
+        # A reload (e.g. after an options change) must re-create coordinators
+        # and re-add every entity, so forget the ones from this entry
+        for coordinator in hass.data[DOMAIN].pop("coordinators", {}).values():
+            await coordinator.async_shutdown()
+        for key in ("entities", "async_add_entities", "async_add_sensor_entities"):
+            hass.data[DOMAIN].pop(key, None)
+        scheduler = hass.data[DOMAIN].pop("scheduler", None)
+        if scheduler:
+            scheduler.shutdown()
+    return unload_ok
+
+
+def _build_timer_payload(data: dict) -> dict:
+    """Build the /timer POST body from start_timer style service data."""
+    seconds = data.get("seconds", -1)
+    minutes = data.get("minutes", -1)
+    endTimeString = data.get("endTime")
+    if endTimeString:
+        now = dt_util.now()
+        today = now.date()
+        parsedTime = datetime.strptime(endTimeString, "%H:%M:%S").time()
+        endTime = dt_util.as_local(datetime.combine(today, parsedTime))
+
+        delta = endTime - now
+        seconds = int(delta.total_seconds())
+        if seconds < 0:
+            _LOGGER.error(
+                "Time specified is in the past - Specified %s, and its now %s",
+                endTimeString,
+                now.time(),
+            )
+            raise Exception("Must specify an endtime in the future")
 
+        _LOGGER.debug(
+            "Endtime  parameter specified (%s) and is overriding seconds. Seconds is now %s",
+            endTime,
+            seconds,
+        )
 
-async def async_setup(hass: HomeAssistant, config: dict):
-    async def post_to_hosts(hosts, endpoint: str, payload: dict):
-        for host in hosts:
-            try:
-                uri = (
-                    f"http://{host['device'].address}:{host['device'].port}/{endpoint}"
-                )
-                async with (
-                    aiohttp.ClientSession() as session,
-                    session.post(uri, json=payload, timeout=5) as response,
-                ):
-                    if response.status != 200:
-                        _LOGGER.error(
-                            "Timerly %s failed for %s: %s",
-                            uri,
-                            host["device"].name,
-                            response.status,
-                        )
-            except Exception as e:
-                _LOGGER.exception(
-                    "Error sending %s to %s - %s", endpoint, host["device"].name, e
-                )
-
-    def get_matching_devices(entity_ids):
-        devices = get_discovered_devices().values()
-        # Determine which hosts match the selected entity_ids
-        if entity_ids:
-            entity_id_values = (
-                entity_ids.values() if isinstance(entity_ids, dict) else entity_ids
+    if minutes > 0:
+        seconds = minutes * 60
+        _LOGGER.debug(
+            "Minutes parameter specified (%s) and is overriding seconds. Seconds is now %s",
+            minutes,
+            seconds,
+        )
+    if seconds <= 0:
+        _LOGGER.error(
+            "Neither a time in the future, minutes or seconds were specified"
+        )
+        raise Exception("Must specify one of endTime, minutes or seconds")
+
+    position = data.get("position", "BottomRight")
+    voice = data.get("voice", True)
+    type_ = data.get("type", "DEFAULT")
+    return {
+        "seconds": seconds,
+        "position": position,
+        "voice": voice,
+        "type": type_,
+        "startTime": int(time.time() * 1000),
+    }
+
+
+class _PhaseTimer:
+    """Milliseconds spent in each phase of a service call."""
+
+    def __init__(self):
+        self._started = self._last = time.monotonic()
+        self.phases_ms: dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        now = time.monotonic()
+        self.phases_ms[phase] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.monotonic() - self._started) * 1000, 1)
+
+
+def _service_response(results: list[dict], timer: _PhaseTimer) -> dict:
+    """Per-device delivery results plus where the call spent its time."""
+    devices = {
+        result["device"]: {
+            "outcome": result["outcome"],
+            "http_status": result["status"],
+            "latency_ms": result["latency_ms"],
+            "attempts": result["attempts"],
+            "error": result["error"],
+        }
+        for result in results
+    }
+    delivered = sum(1 for r in results if r["outcome"] == OUTCOME_DELIVERED)
+    return {
+        "devices": devices,
+        "delivered": delivered,
+        "failed": len(results) - delivered,
+        "phases_ms": timer.phases_ms,
+        "total_ms": timer.total_ms,
+    }
+
+
+def _add_sync_report(response: dict, end_ms: int, coordinators: dict) -> None:
+    """Compare where each device says its timer ends with the shared target.
+
+    This only reflects what the devices echo back, converted through the
+    same clock offset used to send it: firmware that honours ``endTime``
+    reports a spread of about 0 by construction. It catches devices that
+    ignored ``endTime`` or applied it late, not errors in the offset itself.
+    """
+    offsets = []
+    for name, device in response["devices"].items():
+        coordinator = coordinators.get(name)
+        data = coordinator.data if coordinator else None
+        device["end_offset_ms"] = None
+        if device["outcome"] == OUTCOME_DELIVERED and data and data.get("end_ms"):
+            device["end_offset_ms"] = round(
+                coordinator.to_local_ms(data["end_ms"]) - end_ms
             )
-            hosts = [
-                h
-                for h in devices
-                if f"binary_sensor.{h['device'].name.lower().replace(' ', '_')}_timer"
-                in (entity_id_values)
-            ]
-        else:
-            hosts = devices
+            offsets.append(device["end_offset_ms"])
+    response["end_time"] = dt_util.utc_from_timestamp(end_ms / 1000).isoformat()
+    response["spread_ms"] = max(offsets) - min(offsets) if offsets else None
+
 
+async def async_setup(hass: HomeAssistant, config: dict):
+    async def post_to_hosts(hosts, endpoint: str, payload: dict):
+        results = await async_post_to_hosts(hass, hosts, endpoint, payload)
+        coordinators = hass.data.get(DOMAIN, {}).get("coordinators", {})
+        for result in results:
+            coordinator = coordinators.get(result["device"])
+            if coordinator and result["status"] == 200:
+                coordinator.async_command_sent()
+        if outbox := get_outbox(hass):
+            outbox.async_queue_undelivered(results, endpoint, payload)
+        return results
+
+    def get_matching_devices(target: dict):
+        # Determine which hosts match the selected entities, devices, areas,
+        # floors and labels; no selection means every device
+        hosts = get_device_index().resolve_targets(target)
+        if hosts is None:
+            return list(get_discovered_devices().values())
         return hosts
 
-    async def handle_refresh_all(call):
-        entity_registry = async_get_entity_registry(hass)
+    refresh_batcher = RefreshBatcher(hass)
 
-        # Get only binary_sensors from the 'timerly' integration
-        binary_sensor_ids = [
-            entry.entity_id
-            for entry in entity_registry.entities.values()
-            if entry.platform == DOMAIN and entry.entity_id.startswith("binary_sensor.")
+    def get_coordinators(hosts=None):
+        coordinators = hass.data.get(DOMAIN, {}).get("coordinators", {})
+        if hosts is None:
+            return list(coordinators.values())
+        return [
+            coordinators[h["device"].name]
+            for h in hosts
+            if h["device"].name in coordinators
         ]
 
-        platforms = async_get_platforms(hass, DOMAIN)
-        if not platforms:
-            _LOGGER.error("No platforms found for domain '%s'", DOMAIN)
-            return
-
-        for entity_id in binary_sensor_ids:
-            entity = None
-            for platform in platforms:
-                entity = platform.entities.get(entity_id)
-                if entity:
-                    break  # found it!
-
-            if entity:
-                await entity.async_update()
-                entity.async_write_ha_state()
-                _LOGGER.debug("✅ Refreshed %s", entity_id)
-            else:
-                _LOGGER.warning(
-                    "⚠️ Entity %s not found in any timerly platform", entity_id
-                )
-
-    async def handle_start_timer(call: ServiceCall):
-        seconds = call.data.get("seconds", -1)
-        minutes = call.data.get("minutes", -1)
-        endTimeString = call.data.get("endTime")
-        if endTimeString:
-            now = dt_util.now()
-            today = now.date()
-            parsedTime = datetime.strptime(endTimeString, "%H:%M:%S").time()
-            endTime = dt_util.as_local(datetime.combine(today, parsedTime))
-
-            delta = endTime - now
-            seconds = int(delta.total_seconds())
-            if seconds < 0:
-                _LOGGER.error(
-                    "Time specified is in the past - Specified %s, and its now %s",
-                    endTimeString,
-                    now.time(),
-                )
-                raise Exception("Must specify an endtime in the future")
+    async def refresh_hosts(hosts):
+        await refresh_batcher.async_refresh(get_coordinators(hosts))
 
-            _LOGGER.debug(
-                "Endtime  parameter specified (%s) and is overriding seconds. Seconds is now %s",
-                endTime,
-                seconds,
-            )
+    async def handle_refresh_all(call):
+        await refresh_batcher.async_refresh(get_coordinators())
 
-        if minutes > 0:
-            seconds = minutes * 60
-            _LOGGER.debug(
-                "Minutes parameter specified (%s) and is overriding seconds. Seconds is now %s",
-                minutes,
-                seconds,
-            )
-        if seconds <= 0:
-            _LOGGER.error(
-                "Neither a time in the future, minutes or seconds were specified"
-            )
-            raise Exception("Must specify one of endTime, minutes or seconds")
-
-        
-        position = call.data.get("position", "BottomRight")
-        voice = call.data.get("voice", True)
-        type_ = call.data.get("type", "DEFAULT")
-        payload = {
-            "seconds": seconds,
-            "position": position,
-            "voice": voice,
-            "type": type_,
-            "startTime": int(time.time() * 1000),
-        }
+    async def handle_start_timer(call: ServiceCall):
+        timer = _PhaseTimer()
+        payload = _build_timer_payload(call.data)
+        if call.data.get("synchronized"):
+            # One absolute end instant; broadcast maps it onto each device's clock
+            payload["endTime"] = payload["startTime"] + payload["seconds"] * 1000
 
+        results = []
         try:
-            await post_to_hosts(
-                get_matching_devices(call.data.get("entity_id", [])), "timer", payload
-            )
-            await handle_refresh_all(None)
+            hosts = get_matching_devices(call.data)
+            timer.mark("resolve")
+            results = await post_to_hosts(hosts, "timer", payload)
+            timer.mark("send")
+            await refresh_hosts(hosts)
+            timer.mark("refresh")
         except Exception as e:
             _LOGGER.exception("Error starting timer: %s", e)
+            response = _service_response(results, timer)
+            response["error"] = str(e)
+            return response
+
+        response = _service_response(results, timer)
+        if "endTime" in payload:
+            coordinators = hass.data.get(DOMAIN, {}).get("coordinators", {})
+            _add_sync_report(response, payload["endTime"], coordinators)
+            _LOGGER.debug(
+                "⏱️ Synchronized start on %d device(s), spread %s ms",
+                len(results),
+                response["spread_ms"],
+            )
+        return response
+
+    async def handle_start_timers(call: ServiceCall):
+        # Resolve every spec first so each device gets exactly one POST
+        per_device = {}
+        for spec in call.data.get("timers", []):
+            payload = _build_timer_payload(spec)
+            for host in get_matching_devices(spec):
+                name = host["device"].name
+                if name in per_device:
+                    _LOGGER.warning(
+                        "%s is targeted by more than one timer; using the last one",
+                        name,
+                    )
+                per_device[name] = (host, payload)
+
+        # Devices sharing a spec go out as one broadcast; all run concurrently
+        groups = {}
+        for host, payload in per_device.values():
+            groups.setdefault(id(payload), (payload, []))[1].append(host)
+        await asyncio.gather(
+            *(
+                post_to_hosts(hosts, "timer", payload)
+                for payload, hosts in groups.values()
+            )
+        )
+        await refresh_hosts([host for host, _ in per_device.values()])
 
     async def handle_cancel_all(call: ServiceCall):
-        await post_to_hosts(
-            get_matching_devices(call.data.get("entity_id", [])), "cancel", {}
-        )
-        await handle_refresh_all(None)
+        timer = _PhaseTimer()
+        hosts = get_matching_devices(call.data)
+        timer.mark("resolve")
+        results = await post_to_hosts(hosts, "cancel", {})
+        timer.mark("send")
+        await refresh_hosts(hosts)
+        timer.mark("refresh")
+        return _service_response(results, timer)
 
     async def handle_doorbell(call: ServiceCall):
+        timer = _PhaseTimer()
         seconds = call.data.get("duration", 30)
         video = call.data.get("video", "")
-        payload = {"duration": seconds, "videoUri": video}
-        await post_to_hosts(
-            get_matching_devices(call.data.get("entity_id", [])), "doorbell", payload
-        )
+        payload = async_relay_media(hass, {"duration": seconds, "videoUri": video})
+        hosts = get_matching_devices(call.data)
+        timer.mark("resolve")
+        results = await post_to_hosts(hosts, "doorbell", payload)
+        timer.mark("send")
+        return _service_response(results, timer)
 
     async def handle_dismiss(call: ServiceCall):
+        timer = _PhaseTimer()
         name = call.data.get("name", "")
-        await post_to_hosts(
-            get_matching_devices(call.data.get("entity_id", [])),
-            "cancel",
-            {"name": name},
+        hosts = get_matching_devices(call.data)
+        timer.mark("resolve")
+        results = await post_to_hosts(hosts, "cancel", {"name": name})
+        timer.mark("send")
+        return _service_response(results, timer)
+
+    for service, handler in (
+        ("start_timer", handle_start_timer),
+        ("cancel_all", handle_cancel_all),
+        ("doorbell", handle_doorbell),
+        ("dismiss", handle_dismiss),
+    ):
+        hass.services.async_register(
+            DOMAIN, service, handler, supports_response=SupportsResponse.OPTIONAL
         )
-
-    hass.services.async_register(DOMAIN, "start_timer", handle_start_timer)
-    hass.services.async_register(DOMAIN, "cancel_all", handle_cancel_all)
-    hass.services.async_register(DOMAIN, "doorbell", handle_doorbell)
-    hass.services.async_register(DOMAIN, "dismiss", handle_dismiss)
+    hass.services.async_register(DOMAIN, "start_timers", handle_start_timers)
     hass.services.async_register(DOMAIN, "refresh_all", handle_refresh_all)
 
     return True
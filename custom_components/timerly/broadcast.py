@@ -0,0 +1,241 @@
+"""Concurrent command fan-out to Timerly devices."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import secrets
+import time
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes
+
+from .connection import get_connection
+from .const import (
+    BROADCAST_MAX_CONCURRENCY,
+    BROADCAST_TIMEOUT_SEC,
+    COMMAND_DEDUP_WINDOW_SEC,
+    COMMAND_MAX_ATTEMPTS,
+    COMMAND_RETRY_BASE_SEC,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Payload timestamps on HA's clock, shifted onto each device's clock
+CLOCK_FIELDS = ("startTime", "endTime")
+
+OUTCOME_DELIVERED = "delivered"
+OUTCOME_FAILED = "failed"
+OUTCOME_DUPLICATE = "duplicate"
+OUTCOME_UNREACHABLE = "unreachable"
+
+
+def _fingerprint(endpoint: str, payload: dict | bytes) -> str:
+    """Identify a command by content, ignoring when it was issued."""
+    if isinstance(payload, bytes):
+        return hashlib.sha1(endpoint.encode() + b"\0" + payload).hexdigest()
+    content = {
+        key: value for key, value in payload.items() if key not in CLOCK_FIELDS
+    }
+    raw = json.dumps([endpoint, content], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _recent_commands(hass: HomeAssistant) -> dict:
+    """Fingerprints of commands sent recently, mapped to when they expire."""
+    recent = hass.data.setdefault(DOMAIN, {}).setdefault("recent_commands", {})
+    now = time.monotonic()
+    for key in [key for key, expires in recent.items() if expires <= now]:
+        del recent[key]
+    return recent
+
+
+async def async_post_to_hosts(
+    hass: HomeAssistant,
+    hosts,
+    endpoint: str,
+    payload: dict | bytes,
+    timeout: float = BROADCAST_TIMEOUT_SEC,
+    max_concurrency: int = BROADCAST_MAX_CONCURRENCY,
+) -> list[dict]:
+    """POST payload to every host concurrently and return one result per host.
+
+    The payload is serialized once, or may be passed in as JSON bytes, and
+    the same body is sent to every host. The exception is ``startTime`` and
+    ``endTime`` (HA clock), which are shifted onto each device's measured
+    clock; with an ``endTime``, ``seconds`` and ``startTime`` are also
+    recomputed per attempt for the moment the request is expected to arrive,
+    so ``startTime + seconds`` lands exactly on ``endTime``. Each device's
+    requests go over its keep-alive TimerlyConnection. At most
+    ``max_concurrency`` requests are in flight at once, and the whole call is
+    bounded by ``timeout`` seconds: requests still queued or running when the
+    deadline passes are reported as timed out. Devices whose connection is
+    marked dead, or that sent an mDNS goodbye, get a short probe first and
+    are reported unreachable if it fails, rather than waiting out the full
+    timeout.
+
+    Each attempt may use whatever is left of the deadline. Connection errors
+    and 5xx responses are retried with jittered exponential backoff while
+    the deadline allows, carrying the same ``Idempotency-Key`` header. A
+    timeout is not retried: the device may have acted on the request, and
+    not every firmware honours the key. A command identical to the last
+    one sent to the same device within COMMAND_DEDUP_WINDOW_SEC is
+    suppressed and reported as a duplicate. Each result's ``outcome`` is one of delivered, failed,
+    duplicate or unreachable.
+    """
+    hosts = list(hosts)
+    if not hosts:
+        return []
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    # Same for every retry of this call, new for every call, so a deliberate
+    # re-send (start, cancel, start) is not mistaken for a replay
+    key = secrets.token_hex(8)
+    fingerprint = _fingerprint(endpoint, payload)
+    body = payload if isinstance(payload, bytes) else json_bytes(payload)
+    headers = {"Content-Type": "application/json", "Idempotency-Key": key}
+    recent = _recent_commands(hass)
+
+    def _body_for(connection) -> bytes:
+        if not isinstance(payload, dict):
+            return body
+        offset = round(connection.clock_offset_ms)
+        adjusted = {
+            key: payload[key] + offset
+            for key in CLOCK_FIELDS
+            if offset and key in payload
+        }
+        if "endTime" in payload:
+            # For devices that count ``seconds`` from when the request lands,
+            # or from ``startTime``: both must describe the same instant
+            arrival_ms = time.time() * 1000 + (connection.rtt_ms or 0) / 2
+            seconds = max(round((payload["endTime"] - arrival_ms) / 1000), 1)
+            adjusted["seconds"] = seconds
+            adjusted["startTime"] = payload["endTime"] - seconds * 1000 + offset
+        if not adjusted:
+            return body
+        return json_bytes({**payload, **adjusted})
+
+    async def _attempt(connection, uri: str, result: dict):
+        started = time.monotonic()
+        sent_ms = time.time() * 1000
+        attempt_timeout = max(deadline - loop.time(), 0)
+        result["status"] = None
+        try:
+            async with connection.session.post(
+                uri,
+                data=_body_for(connection),
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=attempt_timeout),
+            ) as response:
+                connection.record_clock(sent_ms, time.time() * 1000, response.headers)
+                result["status"] = response.status
+                result["error"] = (
+                    None if response.status == 200 else f"HTTP {response.status}"
+                )
+        except TimeoutError:
+            result["error"] = "timeout"
+        except (aiohttp.ClientError, OSError) as e:
+            result["error"] = str(e) or type(e).__name__
+        result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        connection.record(
+            endpoint,
+            result["status"] is not None and result["status"] < 500,
+            result["latency_ms"],
+            result["error"],
+            timeout=result["error"] == "timeout",
+        )
+
+    async def _post(host) -> dict:
+        device = host["device"]
+        result = {
+            "device": device.name,
+            "outcome": None,
+            "status": None,
+            "latency_ms": None,
+            "attempts": 0,
+            "error": None,
+            "idempotency_key": key,
+        }
+        dedup_key = (device.name, fingerprint)
+        if dedup_key in recent:
+            result["outcome"] = OUTCOME_DUPLICATE
+            _LOGGER.debug("⏭️ Suppressing duplicate %s to %s", endpoint, device.name)
+            return result
+        # Only a repeat of the last command sent to this device is a duplicate
+        for other in [k for k in recent if k[0] == device.name]:
+            del recent[other]
+        recent[dedup_key] = time.monotonic() + COMMAND_DEDUP_WINDOW_SEC
+
+        connection = get_connection(hass, device)
+        uri = connection.url(endpoint)
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout_at(deadline), semaphore:
+                offline = connection.is_dead or host.get("online") is False
+                if offline and not await connection.async_probe():
+                    result["outcome"] = OUTCOME_UNREACHABLE
+                    result["error"] = "unreachable"
+                    recent.pop(dedup_key, None)
+                    _LOGGER.debug(
+                        "⏭️ Skipping %s for unreachable %s", endpoint, device.name
+                    )
+                    return result
+                started = time.monotonic()
+                for attempt in range(1, COMMAND_MAX_ATTEMPTS + 1):
+                    result["attempts"] = attempt
+                    await _attempt(connection, uri, result)
+                    status = result["status"]
+                    if status is not None and status < 500:
+                        # Delivered, or rejected in a way a retry will not fix
+                        break
+                    if result["error"] == "timeout":
+                        # It may have been applied; a retry could repeat it
+                        break
+                    if attempt == COMMAND_MAX_ATTEMPTS:
+                        break
+                    backoff = COMMAND_RETRY_BASE_SEC * 2 ** (attempt - 1)
+                    delay = random.uniform(0, backoff)
+                    if loop.time() + delay >= deadline:
+                        break
+                    _LOGGER.debug(
+                        "🔁 Retrying %s to %s in %.2fs (%s)",
+                        endpoint,
+                        device.name,
+                        delay,
+                        result["error"],
+                    )
+                    await asyncio.sleep(delay)
+        except TimeoutError:
+            result["error"] = "timeout"
+        result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        if result["status"] == 200:
+            result["outcome"] = OUTCOME_DELIVERED
+        else:
+            result["outcome"] = OUTCOME_FAILED
+            # Let a deliberate re-send through once this one has failed
+            recent.pop(dedup_key, None)
+            _LOGGER.warning(
+                "❌ Error sending %s to %s after %d attempt(s) - %s",
+                endpoint,
+                device.name,
+                result["attempts"],
+                result["error"],
+            )
+        return result
+
+    results = await asyncio.gather(*(_post(host) for host in hosts))
+    _LOGGER.debug(
+        "📣 Sent %s to %d device(s): %d delivered",
+        endpoint,
+        len(results),
+        sum(1 for r in results if r["outcome"] == OUTCOME_DELIVERED),
+    )
+    return results
@@ -1,6 +1,41 @@
+import voluptuous as vol
+
 from homeassistant import config_entries
-from .const import DOMAIN
+from homeassistant.core import callback
+
+from .const import CONF_MEDIA_RELAY, CONF_OFFLINE_QUEUE, CONF_PUSH, DOMAIN
 
 class TimerlyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input=None):
-        return self.async_create_entry(title="Timerly", data={})
\ No newline at end of file
+        return self.async_create_entry(title="Timerly", data={})
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return TimerlyOptionsFlow()
+
+
+class TimerlyOptionsFlow(config_entries.OptionsFlow):
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_PUSH, default=options.get(CONF_PUSH, False)
+                    ): bool,
+                    vol.Optional(
+                        CONF_OFFLINE_QUEUE,
+                        default=options.get(CONF_OFFLINE_QUEUE, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_MEDIA_RELAY,
+                        default=options.get(CONF_MEDIA_RELAY, False),
+                    ): bool,
+                }
+            ),
+        )
@@ -0,0 +1,273 @@
+"""Per-device HTTP connections with rolling health statistics."""
+
+from bisect import bisect_left
+from collections import deque
+from email.utils import parsedate_to_datetime
+import logging
+import time
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CLOCK_HEADER,
+    CLOCK_OFFSET_ALPHA,
+    CLOCK_RTT_ALPHA,
+    CLOCK_RTT_OUTLIER_FACTOR,
+    CONNECTION_KEEPALIVE_SEC,
+    CONNECTION_POOL_SIZE,
+    DOMAIN,
+    HEALTH_DEAD_AFTER_FAILURES,
+    HEALTH_LATENCY_GOOD_MS,
+    HEALTH_WINDOW,
+    LATENCY_BUCKETS_MS,
+    PING_TIMEOUT_SEC,
+)
+from .TimerlyDevice import TimerlyDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EndpointStats:
+    """Cumulative counters and a fixed-bucket latency histogram for one endpoint."""
+
+    __slots__ = ("requests", "errors", "timeouts", "total_ms", "buckets")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        # One slot per LATENCY_BUCKETS_MS upper bound, plus overflow
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, ok: bool, latency_ms: float, timeout: bool) -> None:
+        self.requests += 1
+        self.total_ms += latency_ms
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        if not ok:
+            self.errors += 1
+        if timeout:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [
+            f">{LATENCY_BUCKETS_MS[-1]}"
+        ]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": (
+                round(self.total_ms / self.requests, 1) if self.requests else None
+            ),
+            "latency_ms": dict(zip(labels, self.buckets)),
+        }
+
+
+def _device_time_ms(headers) -> tuple[float, bool] | None:
+    """Device wall-clock time from a response, and whether it is precise."""
+    if (value := headers.get(CLOCK_HEADER)) is not None:
+        try:
+            return float(value), True
+        except ValueError:
+            pass
+    if (value := headers.get("Date")) is not None:
+        try:
+            # Truncated to the second
+            return parsedate_to_datetime(value).timestamp() * 1000, False
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+class TimerlyConnection:
+    """Keep-alive connection pool and health score for one Timerly device.
+
+    Every request to the device, whether a poll or a command, goes through
+    the same small pool so TCP connections are reused, and its outcome feeds
+    the rolling latency and error statistics.
+    """
+
+    def __init__(self, device: TimerlyDevice):
+        self.device = device
+        self._session: aiohttp.ClientSession | None = None
+        self._latencies: deque[float] = deque(maxlen=HEALTH_WINDOW)
+        self._outcomes: deque[bool] = deque(maxlen=HEALTH_WINDOW)
+        self.consecutive_errors = 0
+        self.last_error: str | None = None
+        self.endpoints: dict[str, EndpointStats] = {}
+        # Device clock minus HA clock, and round-trip time, both smoothed
+        self.clock_offset_ms = 0.0
+        self.rtt_ms: float | None = None
+        self.clock_samples = 0
+        self._precise_clock_samples = 0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=CONNECTION_POOL_SIZE,
+                    keepalive_timeout=CONNECTION_KEEPALIVE_SEC,
+                )
+            )
+        return self._session
+
+    def url(self, endpoint: str) -> str:
+        return f"http://{self.device.address}:{self.device.port}/{endpoint}"
+
+    def record(
+        self,
+        endpoint: str,
+        ok: bool,
+        latency_ms: float,
+        error: str | None = None,
+        timeout: bool = False,
+    ) -> None:
+        """Record one request's outcome; cheap enough to run on every call."""
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        stats.record(ok, latency_ms, timeout)
+        self._outcomes.append(ok)
+        if ok:
+            self._latencies.append(latency_ms)
+            self.consecutive_errors = 0
+        else:
+            self.consecutive_errors += 1
+            self.last_error = error
+
+    def record_clock(self, sent_ms: float, received_ms: float, headers) -> None:
+        """Update the clock offset estimate from one request/response, NTP-style.
+
+        The device stamped its response somewhere between ``sent_ms`` and
+        ``received_ms`` (HA wall clock); assuming the midpoint, the difference
+        is the offset. Exchanges much slower than usual are skipped for the
+        offset since their midpoint is a poor guess.
+
+        An HTTP Date header only bounds the offset to a window over a second
+        wide, so it never seeds the estimate: the estimate is only moved to
+        the nearest edge of that window when it falls outside. A correct clock
+        with no X-Timerly-Time header therefore stays at exactly 0.
+        """
+        sample = _device_time_ms(headers)
+        if sample is None:
+            return
+        device_ms, precise = sample
+        rtt = received_ms - sent_ms
+        outlier = (
+            self.rtt_ms is not None and rtt > CLOCK_RTT_OUTLIER_FACTOR * self.rtt_ms
+        )
+        self.rtt_ms = (
+            rtt
+            if self.rtt_ms is None
+            else self.rtt_ms + CLOCK_RTT_ALPHA * (rtt - self.rtt_ms)
+        )
+        if outlier:
+            return
+        self.clock_samples += 1
+        if precise:
+            offset = device_ms - (sent_ms + received_ms) / 2
+            if self._precise_clock_samples == 0:
+                self.clock_offset_ms = offset
+            else:
+                self.clock_offset_ms += CLOCK_OFFSET_ALPHA * (
+                    offset - self.clock_offset_ms
+                )
+            self._precise_clock_samples += 1
+            return
+        if self._precise_clock_samples:
+            # Already tracking a millisecond header; Date adds nothing
+            return
+        # The device stamped some instant in [Date, Date + 1 s) while we were
+        # somewhere in [sent_ms, received_ms]
+        low = device_ms - received_ms
+        high = device_ms + 1000 - sent_ms
+        self.clock_offset_ms = min(max(self.clock_offset_ms, low), high)
+
+    @property
+    def is_dead(self) -> bool:
+        return self.consecutive_errors >= HEALTH_DEAD_AFTER_FAILURES
+
+    @property
+    def latency_ms(self) -> float | None:
+        if not self._latencies:
+            return None
+        return round(sum(self._latencies) / len(self._latencies), 1)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return round(self._outcomes.count(False) / len(self._outcomes), 3)
+
+    @property
+    def health_score(self) -> int:
+        """0-100: success rate, scaled down when responses are slow."""
+        if self.is_dead:
+            return 0
+        score = 1.0 - self.error_rate
+        latency = self.latency_ms
+        if latency and latency > HEALTH_LATENCY_GOOD_MS:
+            score *= HEALTH_LATENCY_GOOD_MS / latency
+        return round(score * 100)
+
+    async def async_probe(self) -> bool:
+        """Quick reachability check for a device we believe is dead."""
+        started = time.monotonic()
+        try:
+            async with self.session.get(
+                self.url("timer"), timeout=aiohttp.ClientTimeout(total=PING_TIMEOUT_SEC)
+            ) as resp:
+                ok = resp.status in (200, 404)
+        except (TimeoutError, aiohttp.ClientError, OSError) as e:
+            self.record(
+                "probe",
+                False,
+                (time.monotonic() - started) * 1000,
+                str(e) or type(e).__name__,
+                timeout=isinstance(e, TimeoutError),
+            )
+            return False
+        self.record("probe", ok, (time.monotonic() - started) * 1000)
+        return ok
+
+    @property
+    def timeouts(self) -> int:
+        return sum(stats.timeouts for stats in self.endpoints.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "health_score": self.health_score,
+            "latency_ms": self.latency_ms,
+            "error_rate": self.error_rate,
+            "consecutive_errors": self.consecutive_errors,
+            "last_error": self.last_error,
+            "clock_offset_ms": round(self.clock_offset_ms, 1),
+            "rtt_ms": round(self.rtt_ms, 1) if self.rtt_ms is not None else None,
+            "clock_samples": self.clock_samples,
+            "endpoints": {
+                endpoint: stats.as_dict() for endpoint, stats in self.endpoints.items()
+            },
+        }
+
+    async def async_close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def get_connection(hass: HomeAssistant, device: TimerlyDevice) -> TimerlyConnection:
+    connections = hass.data.setdefault(DOMAIN, {}).setdefault("connections", {})
+    connection = connections.get(device.name)
+    if connection is None:
+        connection = connections[device.name] = TimerlyConnection(device)
+    return connection
+
+
+async def async_close_connections(hass: HomeAssistant) -> None:
+    connections = hass.data.get(DOMAIN, {}).pop("connections", {})
+    for connection in connections.values():
+        await connection.async_close()
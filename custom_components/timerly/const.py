@@ -2,3 +2,70 @@ DOMAIN = "timerly"
 PING_TIMEOUT_SEC = 1
 UPDATE_TIMEOUT_SEC = 10
 SCHEDULER_JOB_END_TIME_REFRESH = "end_time_refresh"
+BROADCAST_TIMEOUT_SEC = 5
+BROADCAST_MAX_CONCURRENCY = 16
+POLL_INTERVAL_SEC = 15
+PUSH_FALLBACK_INTERVAL_SEC = 300
+CONF_PUSH = "push"
+POLL_FAST_INTERVAL_SEC = 5
+POLL_NEAR_END_SEC = 60
+POLL_IDLE_MAX_INTERVAL_SEC = 300
+POLL_UNREACHABLE_MAX_INTERVAL_SEC = 600
+REFRESH_COALESCE_SEC = 0.1
+DEVICE_STORE_KEY = f"{DOMAIN}_devices"
+DEVICE_STORE_VERSION = 1
+DEVICE_STORE_SAVE_DELAY_SEC = 10
+DEVICE_STORE_MAX_AGE_DAYS = 30
+STARTUP_REFRESH_DEADLINE_SEC = 15
+MDNS_SERVICE_TYPE = "_tvtimer._tcp.local."
+MDNS_DEBOUNCE_SEC = 1
+MDNS_RESOLVE_TIMEOUT_MS = 3000
+CONNECTION_POOL_SIZE = 4
+CONNECTION_KEEPALIVE_SEC = 60
+HEALTH_WINDOW = 50
+HEALTH_DEAD_AFTER_FAILURES = 3
+HEALTH_LATENCY_GOOD_MS = 250
+SCHEDULER_JOB_COUNTDOWN_TICK = "countdown_tick"
+SCHEDULER_JOB_TIMER_FINISHED = "timer_finished"
+# A timer that disappears more than this before its end was cancelled
+TIMER_CANCEL_GRACE_SEC = 1
+# Timer properties copied to top-level attributes; the rest of whatever the
+# device echoes back is only exposed under the unrecorded "properties" key
+TIMER_PROPERTY_ATTRIBUTES = ("type", "duration", "seconds", "position", "voice")
+SCHEDULER_TOLERANCE_SEC = 0.1
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+COMMAND_MAX_ATTEMPTS = 3
+COMMAND_RETRY_BASE_SEC = 0.25
+COMMAND_DEDUP_WINDOW_SEC = 2
+CONF_OFFLINE_QUEUE = "offline_queue"
+OUTBOX_STORE_KEY = f"{DOMAIN}_outbox"
+OUTBOX_STORE_VERSION = 1
+OUTBOX_SAVE_DELAY_SEC = 1
+OUTBOX_MAX_PER_DEVICE = 20
+# Seconds a queued command stays deliverable; timers last until their end time
+OUTBOX_TTL_SEC = {"doorbell": 30, "alert": 300, "cancel": 3600}
+CONF_MEDIA_RELAY = "media_relay"
+MEDIA_URI_KEYS = ("imageUri", "audioUri", "videoUri")
+MEDIA_PREFETCH_KEYS = ("imageUri", "audioUri")
+MEDIA_CACHE_MAX_BYTES = 32 * 1024 * 1024
+MEDIA_CACHE_MAX_ITEM_BYTES = 8 * 1024 * 1024
+MEDIA_TOKEN_TTL_SEC = 600
+MEDIA_FETCH_TIMEOUT_SEC = 10
+MEDIA_LIVE_CHUNK_BYTES = 64 * 1024
+MEDIA_LIVE_QUEUE_CHUNKS = 64
+MEDIA_LIVE_IDLE_SEC = 5
+# Without a Content-Length these are streams; anything else is read and cached
+MEDIA_LIVE_TYPES = ("multipart/x-mixed-replace", "video/", "audio/")
+CLOCK_HEADER = "X-Timerly-Time"
+CLOCK_OFFSET_ALPHA = 0.2
+CLOCK_RTT_ALPHA = 0.2
+CLOCK_RTT_OUTLIER_FACTOR = 3
+# Playlists reference segments relative to their own URL, so they are not relayed
+MEDIA_PLAYLIST_SUFFIXES = (".m3u8", ".m3u", ".mpd")
+MEDIA_PLAYLIST_TYPES = (
+    "application/vnd.apple.mpegurl",
+    "application/x-mpegurl",
+    "audio/mpegurl",
+    "audio/x-mpegurl",
+    "application/dash+xml",
+)
@@ -1,15 +1,31 @@
+import asyncio
 from datetime import UTC, datetime, timedelta
 import logging
+import time
 
 import aiohttp
 
 from custom_components.timerly.const import (
+    DOMAIN,
+    POLL_FAST_INTERVAL_SEC,
+    POLL_IDLE_MAX_INTERVAL_SEC,
+    POLL_INTERVAL_SEC,
+    POLL_NEAR_END_SEC,
+    POLL_UNREACHABLE_MAX_INTERVAL_SEC,
+    PUSH_FALLBACK_INTERVAL_SEC,
+    REFRESH_COALESCE_SEC,
     SCHEDULER_JOB_END_TIME_REFRESH,
+    SCHEDULER_JOB_TIMER_FINISHED,
+    SCHEDULER_TOLERANCE_SEC,
+    TIMER_CANCEL_GRACE_SEC,
     UPDATE_TIMEOUT_SEC,
 )
+from custom_components.timerly.connection import get_connection
+from custom_components.timerly.outbox import async_drain_outbox
+from custom_components.timerly.push import get_webhook_url, push_enabled
+from custom_components.timerly.scheduler import TimerlyScheduler
 from custom_components.timerly.TimerlyDevice import TimerlyDevice
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 _LOGGER = logging.getLogger(__name__)
@@ -21,50 +37,176 @@ class TimerlyCoordinator(DataUpdateCoordinator):
             hass,
             _LOGGER,
             name=f"Timerly ({device.name})",
-            update_interval=timedelta(seconds=15),
+            update_interval=timedelta(seconds=POLL_INTERVAL_SEC),
             config_entry=config_entry,
         )
         self.device = device
-        self._session = async_get_clientsession(hass)
+        self.connection = get_connection(hass, device)
         self._scheduler = NamedRefreshScheduler(hass, label=device.name)
         self._scheduled_end_time: datetime | None = None
         self._consecutive_failures = 0
         self._failure_threshold = 2  # or 3 for h
         self._was_running: bool | None = None
+        self._push_subscribed = False
+        self._push_unsupported = False
+        self._idle_polls = 0
+        self._etag: str | None = None
+        self._last_end_ms: int | None = None
+        self._finish_scheduled_for: int | None = None
+        self._finished_end_ms: int | None = None
+        self._retracted_end_ms: int | None = None
 
     def is_running(self, timer_end_ms):
-        return timer_end_ms is not None and timer_end_ms > (
+        return timer_end_ms is not None and self.to_local_ms(timer_end_ms) > (
             datetime.now(UTC).timestamp() * 1000
         )
 
     async def _fetch_timer_data(self):
+        started = time.monotonic()
+        headers = {}
+        if self._etag and self.data is not None:
+            headers["If-None-Match"] = self._etag
         try:
-            url = f"http://{self.device.address}:{self.device.port}/timer"
+            url = self.connection.url("timer")
+            sent_ms = time.time() * 1000
             async with (
-                self._session.get(url, timeout=UPDATE_TIMEOUT_SEC) as resp,
+                self.connection.session.get(
+                    url, headers=headers, timeout=UPDATE_TIMEOUT_SEC
+                ) as resp,
             ):
+                self.connection.record_clock(sent_ms, time.time() * 1000, resp.headers)
+                if resp.status == 304:
+                    # Unchanged since the last poll; skip the body entirely
+                    self._record(True, started)
+                    return self.data
                 if resp.status == 200:
                     newData = await resp.json()
+                    self._etag = resp.headers.get("ETag")
+                    self._record(True, started)
                     _LOGGER.debug("✅ %s: %s", self.device.name, newData)
                     _LOGGER.debug("Headers: %s", resp.headers)
-                    return {
-                        "available": True,
-                        "properties": newData.get("properties", {}),
-                        "end_ms": newData.get("endTime"),
-                    }
+                    return self._parse_timer(newData)
                 if resp.status == 404:
+                    self._etag = resp.headers.get("ETag")
+                    self._record(True, started)
                     return {
                         "available": True,
                         "properties": {},
                         "end_ms": None,
                     }
+                self._record(False, started, f"HTTP {resp.status}")
                 raise UpdateFailed(f"Unexpected HTTP {resp.status}")
         except (TimeoutError, aiohttp.ClientError, OSError) as e:
+            self._record(
+                False,
+                started,
+                str(e) or type(e).__name__,
+                timeout=isinstance(e, TimeoutError),
+            )
             _LOGGER.warning("❌ %s unreachable: %s", self.device.name, e)
             raise UpdateFailed(e) from e
 
+    def _record(self, ok: bool, started: float, error=None, timeout=False):
+        self.connection.record(
+            "timer", ok, (time.monotonic() - started) * 1000, error, timeout
+        )
+
+    @staticmethod
+    def _parse_timer(payload: dict) -> dict:
+        return {
+            "available": True,
+            "properties": payload.get("properties", {}),
+            "end_ms": payload.get("endTime"),
+        }
+
+    async def _maybe_subscribe_push(self):
+        """Ask the device to push timer changes to our webhook.
+
+        Once subscribed, polling drops to a slow heartbeat that only catches
+        missed pushes and devices that silently went away. /subscribe is
+        idempotent and re-sent on every heartbeat, since a TV that rebooted
+        in between forgets it while still answering polls.
+        """
+        if self._push_unsupported or not push_enabled(self.config_entry):
+            return
+        url = self.connection.url("subscribe")
+        payload = {"url": get_webhook_url(self.hass, self.config_entry)}
+        try:
+            async with self.connection.session.post(
+                url, json=payload, timeout=UPDATE_TIMEOUT_SEC
+            ) as resp:
+                if resp.status == 404:
+                    _LOGGER.info(
+                        "[%s] Device does not support push, staying on polling",
+                        self.device.name,
+                    )
+                    self._push_unsupported = True
+                    return
+                if resp.status != 200:
+                    _LOGGER.warning(
+                        "[%s] ⚠️ Push subscription failed: HTTP %s",
+                        self.device.name,
+                        resp.status,
+                    )
+                    return
+        except (TimeoutError, aiohttp.ClientError, OSError) as e:
+            _LOGGER.warning("[%s] ⚠️ Push subscription failed: %s", self.device.name, e)
+            return
+
+        if self._push_subscribed:
+            _LOGGER.debug("[%s] 📬 Renewed push subscription", self.device.name)
+            return
+        _LOGGER.info("[%s] 📬 Subscribed to push updates", self.device.name)
+        self._push_subscribed = True
+        self._update_poll_interval(self.data and self.data.get("end_ms"))
+
+    @callback
+    def async_device_announced(self):
+        """mDNS saw the device (again), possibly after a reboot."""
+        if self._push_subscribed:
+            self.hass.async_create_background_task(
+                self._maybe_subscribe_push(), f"{DOMAIN} resubscribe {self.device.name}"
+            )
+
+    @callback
+    def async_handle_push(self, payload: dict):
+        """Apply a timer state pushed by the device, bypassing the poll."""
+        newData = self._parse_timer(payload)
+        _LOGGER.debug("📬 %s pushed: %s", self.device.name, payload)
+        self._consecutive_failures = 0
+        # Whatever we cached is no longer known to match the device
+        self._etag = None
+        if newData == self.data:
+            return
+        self.handle_state_events(newData)
+        self._maybe_schedule_refresh(newData.get("end_ms"))
+        self.async_set_updated_data(newData)
+
+    @property
+    def clock_offset_ms(self) -> float:
+        """Device clock minus HA clock, estimated from every exchange."""
+        return self.connection.clock_offset_ms
+
+    def to_local_ms(self, device_ms: float) -> float:
+        """Convert a device timestamp to HA's clock."""
+        return device_ms - self.connection.clock_offset_ms
+
+    def to_device_ms(self, local_ms: float) -> float:
+        """Convert an HA timestamp to the device's clock."""
+        return local_ms + self.connection.clock_offset_ms
+
+    def _event_data(self, **extra) -> dict:
+        return {
+            "device_id": self.device.unique_id,
+            "device_name": self.device.name,
+            "entity_id": f"binary_sensor.{self.device.unique_id}",
+            **extra,
+        }
+
     def handle_state_events(self, new_data):
-        is_running_now = new_data.get("end_ms") is not None
+        end_ms = new_data.get("end_ms")
+        is_running_now = end_ms is not None
+        previous_end_ms = self._last_end_ms
 
         if self._was_running is not None and self._was_running != is_running_now:
             # Timer state has changed
@@ -92,8 +234,77 @@ class TimerlyCoordinator(DataUpdateCoordinator):
                         "new_state": new_state,
                     },
                 )
+                self._handle_timer_gone(previous_end_ms)
+        elif is_running_now and end_ms == self._finished_end_ms:
+            self._retract_finished(end_ms)
 
+        self._schedule_finished(end_ms)
         self._was_running = is_running_now
+        self._last_end_ms = end_ms
+
+    def _schedule_finished(self, end_ms: int | None):
+        """Fire timerly_timer_finished at the device's end time, on HA's clock."""
+        if end_ms is None or end_ms in (self._finished_end_ms, self._retracted_end_ms):
+            self._scheduler.cancel(SCHEDULER_JOB_TIMER_FINISHED)
+            self._finish_scheduled_for = None
+            return
+        if self._finish_scheduled_for == end_ms and self._scheduler.is_scheduled(
+            SCHEDULER_JOB_TIMER_FINISHED
+        ):
+            return
+        self._finish_scheduled_for = end_ms
+        local_end = datetime.fromtimestamp(self.to_local_ms(end_ms) / 1000, tz=UTC)
+        self._scheduler.schedule(
+            SCHEDULER_JOB_TIMER_FINISHED,
+            local_end,
+            lambda: self._fire_finished(end_ms, "scheduler"),
+        )
+
+    @callback
+    def _fire_finished(self, end_ms: int, source: str):
+        _LOGGER.info("[%s] ⏰ Timer finished (%s)", self.device.name, source)
+        self._finished_end_ms = end_ms
+        self._finish_scheduled_for = None
+        self.hass.bus.async_fire(
+            "timerly_timer_finished",
+            self._event_data(end_ms=end_ms, source=source),
+        )
+
+    def _retract_finished(self, end_ms: int):
+        """The device still runs a timer we announced as finished."""
+        _LOGGER.info(
+            "[%s] ↩️ Device still running timer, retracting finished event",
+            self.device.name,
+        )
+        self._finished_end_ms = None
+        # Wait for a poll to see it end rather than firing again immediately
+        self._retracted_end_ms = end_ms
+        self.hass.bus.async_fire(
+            "timerly_timer_finish_retracted", self._event_data(end_ms=end_ms)
+        )
+
+    def _handle_timer_gone(self, end_ms: int | None):
+        """Classify a stopped timer as finished (confirmed) or cancelled."""
+        remaining_ms = (
+            self.to_local_ms(end_ms) - time.time() * 1000 if end_ms is not None else 0
+        )
+        if remaining_ms > TIMER_CANCEL_GRACE_SEC * 1000:
+            _LOGGER.info(
+                "[%s] 🛑 Timer cancelled %.1fs early",
+                self.device.name,
+                remaining_ms / 1000,
+            )
+            self.hass.bus.async_fire(
+                "timerly_timer_cancelled",
+                self._event_data(end_ms=end_ms, remaining_ms=int(remaining_ms)),
+            )
+        elif end_ms is not None and end_ms != self._finished_end_ms:
+            # Missed locally (restart, or retracted earlier): the poll confirms it
+            self._fire_finished(end_ms, "poll")
+        else:
+            _LOGGER.debug("[%s] ✅ Timer finish confirmed", self.device.name)
+        self._finished_end_ms = None
+        self._retracted_end_ms = None
 
     async def _async_update_data(self):
         try:
@@ -103,8 +314,15 @@ class TimerlyCoordinator(DataUpdateCoordinator):
             end_ms = newData.get("end_ms")
             self.handle_state_events(newData)
             self._maybe_schedule_refresh(end_ms)
-        except (TimeoutError, aiohttp.ClientError, OSError) as e:
+            await self._maybe_subscribe_push()
+            self._idle_polls = 0 if self.is_running(end_ms) else self._idle_polls + 1
+            self._update_poll_interval(end_ms)
+            async_drain_outbox(self.hass, self.device.name)
+        except (TimeoutError, aiohttp.ClientError, OSError, UpdateFailed) as e:
             self._consecutive_failures += 1
+            # The device may have rebooted and lost our subscription
+            self._push_subscribed = False
+            self._update_poll_interval(None)
 
             if self._consecutive_failures < self._failure_threshold:
                 _LOGGER.warning(
@@ -131,6 +349,63 @@ class TimerlyCoordinator(DataUpdateCoordinator):
         else:
             return newData
 
+    @property
+    def consecutive_failures(self) -> int:
+        return self._consecutive_failures
+
+    @property
+    def push_subscribed(self) -> bool:
+        return self._push_subscribed
+
+    @property
+    def scheduler(self) -> "NamedRefreshScheduler":
+        return self._scheduler
+
+    @property
+    def poll_interval_sec(self) -> int:
+        return int(self.update_interval.total_seconds())
+
+    def _compute_poll_interval(self, end_ms: int | None) -> int:
+        """Pick the next poll interval from the device's current state.
+
+        Unreachable and idle devices back off exponentially, a timer about to
+        end is polled quickly, and a push subscription only needs a heartbeat.
+        """
+        if self._consecutive_failures:
+            return min(
+                POLL_INTERVAL_SEC * 2**self._consecutive_failures,
+                POLL_UNREACHABLE_MAX_INTERVAL_SEC,
+            )
+        if self._push_subscribed:
+            return PUSH_FALLBACK_INTERVAL_SEC
+        if self.is_running(end_ms):
+            remaining_sec = self.to_local_ms(end_ms) / 1000 - time.time()
+            if remaining_sec <= POLL_NEAR_END_SEC:
+                return POLL_FAST_INTERVAL_SEC
+            return POLL_INTERVAL_SEC
+        return min(
+            POLL_INTERVAL_SEC * 2 ** max(self._idle_polls - 1, 0),
+            POLL_IDLE_MAX_INTERVAL_SEC,
+        )
+
+    def _update_poll_interval(self, end_ms: int | None):
+        interval = self._compute_poll_interval(end_ms)
+        if interval != self.poll_interval_sec:
+            _LOGGER.debug(
+                "[%s] ⏲️ Poll interval %ss -> %ss",
+                self.device.name,
+                self.poll_interval_sec,
+                interval,
+            )
+            self.update_interval = timedelta(seconds=interval)
+
+    @callback
+    def async_command_sent(self):
+        """Drop any idle/unreachable back-off once we have talked to the device."""
+        self._idle_polls = 0
+        self._consecutive_failures = 0
+        self._update_poll_interval(None)
+
     def _maybe_schedule_refresh(self, end_ms: int | None):
         """Schedule a one-time refresh at the timer's end time, only if not already scheduled."""
         if not self.is_running(end_ms):
@@ -140,7 +415,7 @@ class TimerlyCoordinator(DataUpdateCoordinator):
             return
 
         new_end_time = datetime.fromtimestamp(end_ms / 1000, tz=UTC)
-        refreshedMS = end_ms + 1000
+        refreshedMS = self.to_local_ms(end_ms) + 1000
         scheduledRefreshTime = datetime.fromtimestamp(refreshedMS / 1000, tz=UTC)
         if (
             self._scheduled_end_time is not None
@@ -172,41 +447,77 @@ class TimerlyCoordinator(DataUpdateCoordinator):
         )
 
 
+class RefreshBatcher:
+    """Coalesce refresh requests from concurrent commands into one pass.
+
+    Callers arriving within the coalescing window share a single flush, and
+    every coordinator in it is refreshed at most once, in parallel.
+    """
+
+    def __init__(self, hass, window: float = REFRESH_COALESCE_SEC):
+        self._hass = hass
+        self._window = window
+        self._pending: set[TimerlyCoordinator] = set()
+        self._flush: asyncio.Task | None = None
+
+    async def async_refresh(self, coordinators):
+        self._pending.update(coordinators)
+        if not self._pending:
+            return
+        if self._flush is None:
+            self._flush = self._hass.async_create_task(self._async_flush())
+        await asyncio.shield(self._flush)
+
+    async def _async_flush(self):
+        await asyncio.sleep(self._window)
+        pending, self._pending = self._pending, set()
+        self._flush = None
+        _LOGGER.debug("🔁 Refreshing %d coordinator(s)", len(pending))
+        await asyncio.gather(*(c.async_refresh() for c in pending))
+
+
+def get_scheduler(hass) -> TimerlyScheduler:
+    """Return the integration-wide scheduler, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if "scheduler" not in domain_data:
+        domain_data["scheduler"] = TimerlyScheduler(
+            hass.loop, SCHEDULER_TOLERANCE_SEC, hass.async_create_task
+        )
+    return domain_data["scheduler"]
+
+
 class NamedRefreshScheduler:
+    """A device's named jobs, stored on the shared TimerlyScheduler."""
+
     def __init__(self, hass, label="Scheduler"):
-        self._hass = hass
-        self._jobs = {}
+        self._scheduler = get_scheduler(hass)
+        self._jobs = set()
         self._label = label
 
     def schedule(self, name: str, utc_time: datetime, callback):
         """Schedule a one-time callback at a specific UTC datetime."""
-        self.cancel(name)
-
         _LOGGER.debug(
             "[%s] 🕒 Scheduling job '%s' at %s", self._label, name, utc_time.isoformat()
         )
 
-        def _wrapped_callback(now):
-            _LOGGER.info("[%s] 🔁 Running job '%s'", self._label, name)
-            self._jobs.pop(name, None)
-            self._hass.loop.call_soon_threadsafe(
-                lambda: self._hass.async_create_task(callback())
-            )
+        def _wrapped_callback():
+            _LOGGER.debug("[%s] 🔁 Running job '%s'", self._label, name)
+            self._jobs.discard(name)
+            return callback()
 
-        self._jobs[name] = async_track_point_in_utc_time(
-            self._hass, _wrapped_callback, utc_time
-        )
+        self._jobs.add(name)
+        self._scheduler.schedule((self._label, name), utc_time, _wrapped_callback)
 
     def cancel(self, name: str):
         """Cancel a specific named job."""
         if name in self._jobs:
             _LOGGER.debug("[%s] ❌ Cancelling job '%s'", self._label, name)
-            self._jobs[name]()
-            del self._jobs[name]
+            self._scheduler.cancel((self._label, name))
+            self._jobs.discard(name)
 
     def cancel_all(self):
         """Cancel all scheduled jobs."""
-        for name in list(self._jobs.keys()):
+        for name in list(self._jobs):
             self.cancel(name)
 
     def is_scheduled(self, name: str) -> bool:
@@ -214,4 +525,4 @@ class NamedRefreshScheduler:
 
     def scheduled_jobs(self):
         """Return a list of currently scheduled job names."""
-        return list(self._jobs.keys())
+        return list(self._jobs)
@@ -0,0 +1,35 @@
+"""Diagnostics download for Timerly: per-device connection and poll metrics."""
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .media import get_media_relay
+from .outbox import get_outbox
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    domain_data = hass.data.get(DOMAIN, {})
+    outbox = get_outbox(hass)
+    devices = {}
+    for name, coordinator in domain_data.get("coordinators", {}).items():
+        devices[name] = {
+            "address": coordinator.device.address,
+            "port": coordinator.device.port,
+            "last_update_success": coordinator.last_update_success,
+            "poll_interval_sec": coordinator.poll_interval_sec,
+            "consecutive_failures": coordinator.consecutive_failures,
+            "push_subscribed": coordinator.push_subscribed,
+            "data": coordinator.data,
+            "connection": coordinator.connection.as_dict(),
+            "queued_commands": outbox.pending(name) if outbox else [],
+        }
+    relay = get_media_relay(hass)
+    return {
+        "options": dict(entry.options),
+        "media_relay": relay.as_dict() if relay else None,
+        "discovered": len(domain_data.get("discovered", {})),
+        "devices": devices,
+    }
@@ -1,16 +1,51 @@
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
 import logging
 
-from zeroconf import ServiceBrowser, ServiceStateChange
+from zeroconf import ServiceStateChange, Zeroconf
+from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo
 
 from homeassistant.components import zeroconf
-from homeassistant.components.zeroconf import async_get_instance
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    ATTR_AREA_ID,
+    ATTR_DEVICE_ID,
+    ATTR_ENTITY_ID,
+    ATTR_FLOOR_ID,
+    ATTR_LABEL_ID,
+    ENTITY_MATCH_ALL,
+    Platform,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
 
 from . import state
-from .const import DOMAIN
+from .const import (
+    DEVICE_STORE_KEY,
+    DEVICE_STORE_MAX_AGE_DAYS,
+    DEVICE_STORE_SAVE_DELAY_SEC,
+    DEVICE_STORE_VERSION,
+    DOMAIN,
+    MDNS_DEBOUNCE_SEC,
+    MDNS_RESOLVE_TIMEOUT_MS,
+    MDNS_SERVICE_TYPE,
+    STARTUP_REFRESH_DEADLINE_SEC,
+)
 from .coordinator import TimerlyCoordinator
-from .entity import TimerlyTimerEntity
+from .entity import (
+    TimerlyEndTimeSensor,
+    TimerlyFailuresSensor,
+    TimerlyHealthSensor,
+    TimerlyLatencySensor,
+    TimerlyRemainingSensor,
+    TimerlyTimerEntity,
+)
+from .outbox import async_drain_outbox
 from .TimerlyDevice import TimerlyDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -23,8 +58,220 @@ def get_discovered_devices():
     return {}
 
 
+class TimerlyDeviceIndex:
+    """Constant-time lookup of discovered devices by entity_id, unique_id, name and area.
+
+    Entity ids, device ids, areas, floors and labels come from the registries
+    rather than being derived from the device name, so renamed entities keep
+    resolving. Every Timerly entity of a device (timer, sensors) maps back to
+    it through its device_id. The index is updated incrementally as devices come and go and
+    as registry entries change.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self._by_name: dict[str, dict] = {}
+        self._by_unique_id: dict[str, str] = {}
+        self._by_entity_id: dict[str, str] = {}
+        self._by_device_id: dict[str, str] = {}
+        self._by_area: dict[str, set[str]] = {}
+        self._by_floor: dict[str, set[str]] = {}
+        self._by_label: dict[str, set[str]] = {}
+        self._registry: dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    @callback
+    def async_add(self, host: dict) -> None:
+        device = host["device"]
+        self._by_name[device.name] = host
+        self._by_unique_id[device.unique_id] = device.name
+        self._async_update_registry(device.name)
+
+    @callback
+    def async_remove(self, name: str) -> None:
+        host = self._by_name.pop(name, None)
+        if host is None:
+            return
+        self._by_unique_id.pop(host["device"].unique_id, None)
+        self._async_set_registry(name, {})
+        self._registry.pop(name, None)
+
+    def resolve_targets(self, target: dict) -> list[dict] | None:
+        """Resolve a service target selection to hosts in a single pass.
+
+        ``target`` holds the ``entity_id``, ``device_id``, ``area_id``,
+        ``floor_id`` and ``label_id`` keys Home Assistant puts in service
+        data. Returns None when nothing was selected, meaning "all devices".
+        """
+        names: dict[str, None] = {}
+        selected = False
+        for key, lookup in (
+            (ATTR_ENTITY_ID, self._by_entity_id),
+            (ATTR_DEVICE_ID, self._by_device_id),
+        ):
+            for value in _as_list(target.get(key)):
+                selected = True
+                if value == ENTITY_MATCH_ALL:
+                    return list(self._by_name.values())
+                name = lookup.get(value) or self._by_unique_id.get(value)
+                if name is None and value in self._by_name:
+                    name = value
+                if name is not None:
+                    names[name] = None
+        for key, lookup in (
+            (ATTR_AREA_ID, self._by_area),
+            (ATTR_FLOOR_ID, self._by_floor),
+            (ATTR_LABEL_ID, self._by_label),
+        ):
+            for value in _as_list(target.get(key)):
+                selected = True
+                names.update(dict.fromkeys(lookup.get(value, ())))
+        if not selected:
+            return None
+        return [self._by_name[name] for name in names]
+
+    @callback
+    def _async_update_registry(self, name: str) -> None:
+        """Re-read a device's registry placement (entities, device, area, floor, labels)."""
+        device = self._by_name[name]["device"]
+        ent_reg = er.async_get(self._hass)
+        dev_reg = dr.async_get(self._hass)
+        entity_id = ent_reg.async_get_entity_id(
+            Platform.BINARY_SENSOR, DOMAIN, device.unique_id
+        )
+        entry = ent_reg.async_get(entity_id) if entity_id else None
+        device_entry = (
+            dev_reg.async_get(entry.device_id)
+            if entry and entry.device_id
+            else dev_reg.async_get_device(identifiers={(DOMAIN, device.name)})
+        )
+        record = {"entity_ids": set(), "labels": set()}
+        if entity_id:
+            record["entity_ids"].add(entity_id)
+        if entry:
+            record["area_id"] = entry.area_id
+            record["labels"] = set(entry.labels)
+        if device_entry:
+            record["device_id"] = device_entry.id
+            record["area_id"] = record.get("area_id") or device_entry.area_id
+            record["labels"] |= device_entry.labels
+            record["entity_ids"].update(
+                entity.entity_id
+                for entity in er.async_entries_for_device(
+                    ent_reg, device_entry.id, include_disabled_entities=True
+                )
+                if entity.platform == DOMAIN
+            )
+        if record.get("area_id"):
+            area = ar.async_get(self._hass).async_get_area(record["area_id"])
+            record["floor_id"] = area.floor_id if area else None
+        self._async_set_registry(name, record)
+
+    @callback
+    def _async_set_registry(self, name: str, record: dict) -> None:
+        old = self._registry.get(name, {})
+        old_entity_ids = old.get("entity_ids", set())
+        new_entity_ids = record.get("entity_ids", set())
+        for entity_id in old_entity_ids - new_entity_ids:
+            self._by_entity_id.pop(entity_id, None)
+        for entity_id in new_entity_ids:
+            self._by_entity_id[entity_id] = name
+        if old.get("device_id") != record.get("device_id"):
+            self._by_device_id.pop(old.get("device_id"), None)
+            if record.get("device_id"):
+                self._by_device_id[record["device_id"]] = name
+        for key, lookup in (
+            ("area_id", self._by_area),
+            ("floor_id", self._by_floor),
+        ):
+            if old.get(key) != record.get(key):
+                lookup.get(old.get(key), set()).discard(name)
+                if record.get(key):
+                    lookup.setdefault(record[key], set()).add(name)
+        old_labels = old.get("labels", set())
+        new_labels = record.get("labels", set())
+        for label in old_labels - new_labels:
+            self._by_label[label].discard(name)
+        for label in new_labels - old_labels:
+            self._by_label.setdefault(label, set()).add(name)
+        self._registry[name] = record
+
+    @callback
+    def _async_entity_registry_updated(self, event: Event) -> None:
+        data = event.data
+        old_name = self._by_entity_id.get(data.get("old_entity_id", data["entity_id"]))
+        entry = er.async_get(self._hass).async_get(data["entity_id"])
+        if entry and entry.platform == DOMAIN:
+            name = self._by_device_id.get(entry.device_id)
+            if name is None and entry.domain == Platform.BINARY_SENSOR:
+                name = self._by_unique_id.get(entry.unique_id)
+            if name:
+                self._async_update_registry(name)
+        if old_name and old_name in self._by_name:
+            self._async_update_registry(old_name)
+
+    @callback
+    def _async_device_registry_updated(self, event: Event) -> None:
+        name = self._by_device_id.get(event.data["device_id"])
+        if name and name in self._by_name:
+            self._async_update_registry(name)
+
+    @callback
+    def _async_area_registry_updated(self, event: Event) -> None:
+        # An area may have moved to another floor
+        for name in list(self._by_area.get(event.data["area_id"], ())):
+            self._async_update_registry(name)
+
+    @callback
+    def async_start(self):
+        """Track registry changes; returns a callback that stops tracking."""
+        unsubs = [
+            self._hass.bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_entity_registry_updated
+            ),
+            self._hass.bus.async_listen(
+                dr.EVENT_DEVICE_REGISTRY_UPDATED, self._async_device_registry_updated
+            ),
+            self._hass.bus.async_listen(
+                ar.EVENT_AREA_REGISTRY_UPDATED, self._async_area_registry_updated
+            ),
+        ]
+
+        @callback
+        def _unsub():
+            for unsub in unsubs:
+                unsub()
+
+        return _unsub
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+def get_device_index() -> TimerlyDeviceIndex | None:
+    """Return the shared device index, creating it on first use."""
+    if not state.hass_ref:
+        return None
+    domain_data = state.hass_ref.data.setdefault(DOMAIN, {})
+    if "index" not in domain_data:
+        domain_data["index"] = TimerlyDeviceIndex(state.hass_ref)
+    return domain_data["index"]
+
+
+@callback
 def add_discovered_device(device) -> None:
-    """Store or update a discovered Timerly device in the global cache."""
+    """Store or update a discovered Timerly device in the global cache.
+
+    A device already known under the same name (restored from storage, or an
+    mDNS Updated event) keeps its TimerlyDevice object, updated in place.
+    """
     if not state.hass_ref:
         return
 
@@ -37,12 +284,118 @@ def add_discovered_device(device) -> None:
     if device.name in discovered:
         entry = discovered[device.name]
         entry["last_seen"] = now
+        entry["online"] = True
+        known = entry["device"]
+        if (known.address, known.port) != (device.address, device.port):
+            # Coordinators hold the same object, so they follow the move
+            _LOGGER.info(
+                "🔀 %s moved from %s:%s to %s:%s",
+                device.name,
+                known.address,
+                known.port,
+                device.address,
+                device.port,
+            )
+            known.address = device.address
+            known.port = device.port
         _LOGGER.debug("🔄 Updated last_seen for %s", device.name)
     else:
         discovered[device.name] = {"device": device, "last_seen": now}
+        get_device_index().async_add(discovered[device.name])
         _LOGGER.debug("📦 Added new Timerly device: %s", device.name)
 
     _LOGGER.debug("📦 Discovery cache now has %d devices", len(discovered))
+    async_schedule_save_devices(hass)
+    async_drain_outbox(hass, device.name)
+    if coordinator := hass.data[DOMAIN].get("coordinators", {}).get(device.name):
+        coordinator.async_device_announced()
+
+
+@callback
+def async_forget_device(hass: HomeAssistant, name: str) -> None:
+    """Drop a device the user deleted, so only a new mDNS announcement brings it back."""
+    domain_data = hass.data.get(DOMAIN, {})
+    domain_data.get("discovered", {}).pop(name, None)
+    domain_data.get("stored_devices", {}).pop(name, None)
+    get_device_index().async_remove(name)
+    if coordinator := domain_data.get("coordinators", {}).pop(name, None):
+        coordinator.scheduler.cancel_all()
+        hass.async_create_task(coordinator.async_shutdown())
+    if device_entry := dr.async_get(hass).async_get_device(
+        identifiers={(DOMAIN, name)}
+    ):
+        # Let try_add_new_entities create them again if it comes back
+        unique_ids = {
+            entity.unique_id
+            for entity in er.async_entries_for_device(
+                er.async_get(hass), device_entry.id, include_disabled_entities=True
+            )
+        }
+        domain_data["entities"] = [
+            unique_id
+            for unique_id in domain_data.get("entities", [])
+            if unique_id not in unique_ids
+        ]
+    _LOGGER.info("🧹 Forgot Timerly device %s", name)
+    async_schedule_save_devices(hass)
+
+
+def _get_device_store(hass: HomeAssistant) -> Store:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if "device_store" not in domain_data:
+        domain_data["device_store"] = Store(
+            hass, DEVICE_STORE_VERSION, DEVICE_STORE_KEY
+        )
+    return domain_data["device_store"]
+
+
+@callback
+def async_schedule_save_devices(hass: HomeAssistant) -> None:
+    """Persist the discovery cache, batching bursts of mDNS updates."""
+
+    def _data():
+        stored = hass.data[DOMAIN].get("stored_devices", {})
+        for name, entry in get_discovered_devices().items():
+            device = entry["device"]
+            stored[name] = {
+                "name": name,
+                "address": device.address,
+                "port": device.port,
+                "last_seen": entry["last_seen"].isoformat(),
+            }
+        return {"devices": list(stored.values())}
+
+    _get_device_store(hass).async_delay_save(_data, DEVICE_STORE_SAVE_DELAY_SEC)
+
+
+async def async_restore_devices(hass: HomeAssistant) -> int:
+    """Load previously discovered devices so entities exist before mDNS answers.
+
+    Devices stay in the store when mDNS reports them gone (TVs asleep), and
+    are only forgotten once they have not been seen for
+    DEVICE_STORE_MAX_AGE_DAYS.
+    """
+    data = await _get_device_store(hass).async_load() or {}
+    discovered = hass.data[DOMAIN].setdefault("discovered", {})
+    stored = hass.data[DOMAIN].setdefault("stored_devices", {})
+    cutoff = datetime.utcnow() - timedelta(days=DEVICE_STORE_MAX_AGE_DAYS)
+    restored = 0
+
+    for item in data.get("devices", []):
+        last_seen = datetime.fromisoformat(item["last_seen"])
+        if last_seen < cutoff:
+            _LOGGER.info("🧹 Forgetting %s, not seen since %s", item["name"], last_seen)
+            continue
+        stored[item["name"]] = item
+        if item["name"] in discovered:
+            continue
+        device = TimerlyDevice(item["name"], item["address"], item["port"])
+        discovered[device.name] = {"device": device, "last_seen": last_seen}
+        get_device_index().async_add(discovered[device.name])
+        restored += 1
+
+    _LOGGER.debug("💾 Restored %d Timerly devices from storage", restored)
+    return restored
 
 
 async def mock_mdns(hass: HomeAssistant):
@@ -58,62 +411,113 @@ async def mock_mdns(hass: HomeAssistant):
     )
 
     # # ✅ Trigger entity registration
-    if "component" in hass.data[DOMAIN]:
+    if "async_add_entities" in hass.data[DOMAIN]:
         _LOGGER.debug("📡 Passing off to try_add_new_entities")
-        hass.loop.call_soon_threadsafe(
-            lambda: hass.async_create_task(try_add_new_entities(hass))
-        )
+        await try_add_new_entities(hass)
 
 
 async def async_setup_mdns(hass: HomeAssistant):
-    """Start mDNS discovery of Timerly devices and register callback."""
-    zc = await async_get_instance(hass)
+    """Start mDNS discovery of Timerly devices and register callback.
+
+    Browser events are only queued here; a debouncer folds a burst of them
+    (router reboot, a room of TVs waking up) into one batched reconciliation
+    that resolves service info concurrently and adds entities once.
+    """
+    aiozc = await zeroconf.async_get_async_instance(hass)
 
     # Ensure our integration dict is present
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN].setdefault("discovered", {})
 
+    # Latest state change per service name, waiting to be processed
+    pending: dict[str, tuple[str, ServiceStateChange]] = {}
+
+    async def _async_resolve(service_type: str, name: str) -> TimerlyDevice | None:
+        info = AsyncServiceInfo(service_type, name)
+        if not await info.async_request(aiozc.zeroconf, MDNS_RESOLVE_TIMEOUT_MS):
+            _LOGGER.warning("⚠️ Could not resolve mDNS service %s", name)
+            return None
+        addresses = info.parsed_addresses()
+        if not addresses:
+            return None
+        return TimerlyDevice(name, addresses[0], info.port)
+
+    async def _async_process_batch() -> None:
+        events = dict(pending)
+        pending.clear()
+        to_resolve = []
+        for name, (service_type, state_change) in events.items():
+            if state_change is ServiceStateChange.Removed:
+                device = TimerlyDevice(
+                    name, "", ""
+                )  # JUST USING THE OBJECT TO GET THE PROPER NAME
+                # TVs send a goodbye when switched off; keep them targetable so
+                # commands to them fail fast and can be queued
+                if entry := hass.data[DOMAIN]["discovered"].get(device.name):
+                    entry["online"] = False
+                _LOGGER.info("💤 Timerly device went offline: %s", device.name)
+            else:
+                to_resolve.append((service_type, name))
+
+        if not to_resolve:
+            return
+
+        _LOGGER.debug("🔁 Resolving %d mDNS service(s)", len(to_resolve))
+        devices = await asyncio.gather(
+            *(_async_resolve(service_type, name) for service_type, name in to_resolve)
+        )
+        for device in devices:
+            if device is None:
+                continue
+            add_discovered_device(device)
+            _LOGGER.info(
+                "📡 Discovered Timerly device: %s (%s:%d)",
+                device.name,
+                device.address,
+                device.port,
+            )
+
+        # # ✅ Trigger entity registration
+        if "async_add_entities" in hass.data[DOMAIN]:
+            _LOGGER.info("📡 Passing off to try_add_new_entities")
+            await try_add_new_entities(hass)
+        else:
+            _LOGGER.debug("⚠️ async_add_entities not yet initialized")
+
+    async def _async_process_events() -> None:
+        # The debouncer ignores calls made while this runs, so anything that
+        # arrived during resolution is handled here rather than left waiting
+        while pending:
+            await _async_process_batch()
+
+    debouncer = Debouncer(
+        hass,
+        _LOGGER,
+        cooldown=MDNS_DEBOUNCE_SEC,
+        immediate=False,
+        function=_async_process_events,
+    )
+
     def service_handler(
-        zeroconf: zeroconf,
+        zeroconf: Zeroconf,
         service_type: str,
         name: str,
         state_change: ServiceStateChange,
     ) -> None:
+        # AsyncServiceBrowser calls handlers on the event loop
         _LOGGER.debug("🔁 mDNS event: %s (%s)", name, state_change)
+        pending[name] = (service_type, state_change)
+        debouncer.async_schedule_call()
 
-        if state_change is ServiceStateChange.Added:
-            info = zeroconf.get_service_info(service_type, name)
-            if info:
-                address = info.parsed_addresses()[0]
-                port = info.port
-
-                device = TimerlyDevice(name, address, port)
-
-                add_discovered_device(device)
-                _LOGGER.info(
-                    "📡 Discovered Timerly device: %s (%s:%d)",
-                    device.name,
-                    address,
-                    port,
-                )
-
-                # # ✅ Trigger entity registration
-                if "async_add_entities" in hass.data[DOMAIN]:
-                    _LOGGER.info("📡 Passing off to try_add_new_entities")
-                    hass.loop.call_soon_threadsafe(
-                        lambda: hass.async_create_task(try_add_new_entities(hass))
-                    )
-                else:
-                    _LOGGER.debug("⚠️ async_add_entities not yet initialized")
+    browser = AsyncServiceBrowser(
+        aiozc.zeroconf, [MDNS_SERVICE_TYPE], handlers=[service_handler]
+    )
 
-        elif state_change is ServiceStateChange.Removed:
-            device = TimerlyDevice(
-                name, "", ""
-            )  # JUST USING THE OBJECT TO GET THE PROPER NAME
-            state.hass_ref.data[DOMAIN]["discovered"].pop(device.name, None)
-            _LOGGER.info("❌ Timerly device removed: %s", device.name)
+    async def _async_stop() -> None:
+        debouncer.async_cancel()
+        await browser.async_cancel()
 
-    return ServiceBrowser(zc, ["_tvtimer._tcp.local."], handlers=[service_handler])
+    return _async_stop
 
 
 async def try_add_new_entities(hass: HomeAssistant):
@@ -125,11 +529,14 @@ async def try_add_new_entities(hass: HomeAssistant):
         return
 
     async_add_entities = hass.data[DOMAIN].get("async_add_entities")
+    async_add_sensor_entities = hass.data[DOMAIN].get("async_add_sensor_entities")
     entry = hass.data[DOMAIN]["entry"]
     existing_entity_ids = hass.data[DOMAIN].setdefault("entities", [])
     coordinators = hass.data[DOMAIN].setdefault("coordinators", {})
 
     new_entities = []
+    new_sensor_entities = []
+    new_coordinators = []
 
     for name, device_info in list(discovered.items()):
         _LOGGER.info("🆕 Checking %s", name)
@@ -140,15 +547,8 @@ async def try_add_new_entities(hass: HomeAssistant):
         if name not in coordinators:
             _LOGGER.info("🧠 Creating new coordinator for %s", name)
             coordinator = TimerlyCoordinator(hass, device, entry)
-
-            # ✅ FIX: Use async_refresh() instead of first_refresh()
-            # first_refresh() raises an error if the entry is already LOADED.
-            try:
-                await coordinator.async_refresh()
-                coordinators[name] = coordinator
-            except Exception as err:
-                _LOGGER.error("Failed to initialize coordinator for %s: %s", name, err)
-                continue  # Skip this device and try the next one
+            coordinators[name] = coordinator
+            new_coordinators.append(coordinator)
         else:
             coordinator = coordinators[name]
             _LOGGER.debug("♻️ Reusing existing coordinator for %s", name)
@@ -164,8 +564,54 @@ async def try_add_new_entities(hass: HomeAssistant):
         else:
             _LOGGER.debug("🧩 Entity already known: %s", unique_id)
 
+        if async_add_sensor_entities:
+            for sensor in (
+                TimerlyEndTimeSensor(coordinator, entry),
+                TimerlyRemainingSensor(coordinator, entry),
+                TimerlyHealthSensor(coordinator, entry),
+                TimerlyLatencySensor(coordinator, entry),
+                TimerlyFailuresSensor(coordinator, entry),
+            ):
+                if sensor.unique_id not in existing_entity_ids:
+                    new_sensor_entities.append(sensor)
+                    existing_entity_ids.append(sensor.unique_id)
+
     _LOGGER.debug("📦 Entity cache now has %d entities", len(existing_entity_ids))
 
     if new_entities:
         _LOGGER.info("🧱 Adding %d new Timerly entities", len(new_entities))
         async_add_entities(new_entities)
+    if new_sensor_entities:
+        async_add_sensor_entities(new_sensor_entities)
+
+    if new_coordinators:
+        # Entities start out unavailable and fill in as each device answers,
+        # so one unreachable TV never holds up the rest
+        hass.async_create_background_task(
+            _async_first_refresh(new_coordinators), f"{DOMAIN} first refresh"
+        )
+
+
+async def _async_first_refresh(coordinators) -> None:
+    """Run the first refresh of new coordinators concurrently."""
+    # ✅ Use async_refresh() instead of first_refresh()
+    # first_refresh() raises an error if the entry is already LOADED.
+    tasks = {
+        asyncio.create_task(coordinator.async_refresh()): coordinator
+        for coordinator in coordinators
+    }
+    done, pending = await asyncio.wait(tasks, timeout=STARTUP_REFRESH_DEADLINE_SEC)
+    for task in done:
+        if task.exception():
+            _LOGGER.error(
+                "Failed to initialize coordinator for %s: %s",
+                tasks[task].device.name,
+                task.exception(),
+            )
+    if pending:
+        _LOGGER.warning(
+            "⏳ %d device(s) still initializing after %ss: %s",
+            len(pending),
+            STARTUP_REFRESH_DEADLINE_SEC,
+            ", ".join(tasks[task].device.name for task in pending),
+        )
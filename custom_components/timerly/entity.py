@@ -1,77 +1,347 @@
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+import time
 
-from custom_components.timerly.const import DOMAIN
+from custom_components.timerly.const import (
+    DOMAIN,
+    SCHEDULER_JOB_COUNTDOWN_TICK,
+    TIMER_PROPERTY_ATTRIBUTES,
+)
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
     BinarySensorEntity,
 )
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .coordinator import TimerlyCoordinator
 
 
-class TimerlyTimerEntity(CoordinatorEntity, BinarySensorEntity):
+class TimerlyEntity(CoordinatorEntity[TimerlyCoordinator]):
+    """Base for entities attached to one Timerly device."""
+
+    _attr_has_entity_name = True
+
     def __init__(self, coordinator: TimerlyCoordinator, config_entry):
         super().__init__(coordinator)
+        self._attr_config_entry_id = config_entry.entry_id
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"{self.coordinator.device.name}")},
+            manufacturer="Timerly",
+            name=self.coordinator.device.name,
+            sw_version="1.0.0",
+            model="Timerly Visual Timer",
+        )
+
+
+class TimerlyTimerEntity(TimerlyEntity, BinarySensorEntity):
+    # Derived on every write or echoed back from the POST payload; keeping
+    # them out of history stops each poll from storing a new attribute row
+    _unrecorded_attributes = frozenset(
+        {
+            "end_ms",
+            "remaining_sec",
+            "remaining_time",
+            "poll_interval_sec",
+            "position",
+            "voice",
+            "seconds",
+            "properties",
+        }
+    )
+
+    _attr_snapshot: dict | None = None
+    _written_key: tuple | None = None
+
+    def __init__(self, coordinator: TimerlyCoordinator, config_entry):
+        super().__init__(coordinator, config_entry)
         self._attr_name = "Timer"
         self._attr_icon = "mdi:bell-badge"
         self._attr_device_class = BinarySensorDeviceClass.RUNNING
         self._attr_unique_id = coordinator.device.unique_id
-        self._attr_config_entry_id = config_entry.entry_id
-        self._attr_has_entity_name = True
 
     @property
     def available(self):
-        return self.coordinator.last_update_success and self.coordinator.data.get(
-            "available"
+        # data is None until the first refresh completes in the background
+        return (
+            self.coordinator.data is not None
+            and self.coordinator.last_update_success
+            and self.coordinator.data.get("available")
         )
 
     @property
     def is_on(self):
+        if self.coordinator.data is None:
+            return None
         return self.coordinator.is_running(self.coordinator.data.get("end_ms"))
 
-    @property
-    def extra_state_attributes(self):
+    def _state_key(self) -> tuple:
+        """Everything the written state depends on, apart from the clock."""
+        return (
+            self.available,
+            self.is_on,
+            self.coordinator.poll_interval_sec,
+            self.coordinator.data,
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # Most polls return the same timer payload; skip the write (and the
+        # recorder row for the changing remaining_* attributes) for those
+        key = self._state_key()
+        if key == self._written_key:
+            return
+        self._written_key = key
+        self._attr_snapshot = None
+        super()._handle_coordinator_update()
+
+    def _build_snapshot(self) -> dict:
+        """Attributes that only change when the coordinator has new data."""
         props = self.coordinator.data.get("properties", {})
         end_ms = self.coordinator.data.get("end_ms")
         start_ms = props.get("startTime")
 
         attrs = {
-            "end_ms": self.coordinator.data.get("end_ms"),
+            "end_ms": end_ms,
             "device": self.coordinator.device.name,
             "start_time_utc": None,
             "end_time_utc": None,
             "remaining_time": "idle",
-            **props,
+            "poll_interval_sec": self.coordinator.poll_interval_sec,
+            **{key: props[key] for key in TIMER_PROPERTY_ATTRIBUTES if key in props},
+            # Whatever the firmware echoes back, however many keys it has
+            "properties": props,
         }
 
+        # Device timestamps, shifted onto HA's clock
         if start_ms:
-            start_utc = datetime.fromtimestamp(start_ms / 1000, tz=UTC)
+            start_utc = datetime.fromtimestamp(
+                self.coordinator.to_local_ms(start_ms) / 1000, tz=UTC
+            )
             attrs["start_time_utc"] = start_utc.isoformat()
         if end_ms:
-            end_utc = datetime.fromtimestamp(end_ms / 1000, tz=UTC)
+            end_utc = datetime.fromtimestamp(
+                self.coordinator.to_local_ms(end_ms) / 1000, tz=UTC
+            )
             attrs["end_time_utc"] = end_utc.isoformat()
 
-            remaining = int((end_utc - datetime.now(UTC)).total_seconds())
-            attrs["remaining_sec"] = remaining
-            if remaining > 0:
-                mins, secs = divmod(remaining, 60)
-                hrs, mins = divmod(mins, 60)
-                attrs["remaining_time"] = (
-                    f"{hrs}h {mins}m {secs}s" if hrs > 0 else f"{mins}m {secs}s"
-                )
-            else:
-                attrs["remaining_time"] = "0s"
-
         return attrs
 
     @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={(DOMAIN, f"{self.coordinator.device.name}")},
-            manufacturer="Timerly",
-            name=self.coordinator.device.name,
-            sw_version="1.0.0",
-            model="Timerly Visual Timer",
+    def extra_state_attributes(self):
+        if self.coordinator.data is None:
+            return None
+        if self._attr_snapshot is None:
+            self._attr_snapshot = self._build_snapshot()
+
+        end_ms = self._attr_snapshot["end_ms"]
+        if not end_ms:
+            return self._attr_snapshot
+
+        remaining = int(self.coordinator.to_local_ms(end_ms) / 1000 - time.time())
+        if remaining > 0:
+            mins, secs = divmod(remaining, 60)
+            hrs, mins = divmod(mins, 60)
+            remaining_time = (
+                f"{hrs}h {mins}m {secs}s" if hrs > 0 else f"{mins}m {secs}s"
+            )
+        else:
+            remaining_time = "0s"
+        return {
+            **self._attr_snapshot,
+            "remaining_sec": remaining,
+            "remaining_time": remaining_time,
+        }
+
+
+class TimerlyHealthSensor(TimerlyEntity, SensorEntity):
+    """Diagnostic 0-100 score from the device's recent latency and errors."""
+
+    def __init__(self, coordinator: TimerlyCoordinator, config_entry):
+        super().__init__(coordinator, config_entry)
+        self._attr_name = "Health"
+        self._attr_icon = "mdi:heart-pulse"
+        self._attr_unique_id = f"{coordinator.device.unique_id}_health"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def available(self):
+        # Health is most interesting exactly when the device is not answering
+        return True
+
+    @property
+    def native_value(self):
+        return self.coordinator.connection.health_score
+
+    @property
+    def extra_state_attributes(self):
+        connection = self.coordinator.connection
+        return {
+            "latency_ms": connection.latency_ms,
+            "error_rate": connection.error_rate,
+            "consecutive_errors": connection.consecutive_errors,
+            "last_error": connection.last_error,
+        }
+
+
+class TimerlyLatencySensor(TimerlyEntity, SensorEntity):
+    """Diagnostic rolling average response time, with per-endpoint counters."""
+
+    def __init__(self, coordinator: TimerlyCoordinator, config_entry):
+        super().__init__(coordinator, config_entry)
+        self._attr_name = "Latency"
+        self._attr_icon = "mdi:timer-sync-outline"
+        self._attr_unique_id = f"{coordinator.device.unique_id}_latency"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_entity_registry_enabled_default = False
+
+    @property
+    def available(self):
+        return True
+
+    @property
+    def native_value(self):
+        return self.coordinator.connection.latency_ms
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            endpoint: {
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "timeouts": stats.timeouts,
+            }
+            for endpoint, stats in self.coordinator.connection.endpoints.items()
+        }
+
+
+class TimerlyFailuresSensor(TimerlyEntity, SensorEntity):
+    """Diagnostic count of consecutive failed polls."""
+
+    def __init__(self, coordinator: TimerlyCoordinator, config_entry):
+        super().__init__(coordinator, config_entry)
+        self._attr_name = "Consecutive failures"
+        self._attr_icon = "mdi:lan-disconnect"
+        self._attr_unique_id = f"{coordinator.device.unique_id}_failures"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_entity_registry_enabled_default = False
+
+    @property
+    def available(self):
+        return True
+
+    @property
+    def native_value(self):
+        return self.coordinator.consecutive_failures
+
+    @property
+    def extra_state_attributes(self):
+        return {"timeouts": self.coordinator.connection.timeouts}
+
+
+class TimerlyEndTimeSensor(TimerlyEntity, SensorEntity):
+    """When the running timer ends; unknown while idle."""
+
+    def __init__(self, coordinator: TimerlyCoordinator, config_entry):
+        super().__init__(coordinator, config_entry)
+        self._attr_name = "Timer end"
+        self._attr_icon = "mdi:timer-sand-complete"
+        self._attr_unique_id = f"{coordinator.device.unique_id}_end_time"
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    @property
+    def available(self):
+        return (
+            self.coordinator.data is not None and self.coordinator.last_update_success
+        )
+
+    @property
+    def native_value(self):
+        end_ms = self.coordinator.data and self.coordinator.data.get("end_ms")
+        if not self.coordinator.is_running(end_ms):
+            return None
+        return datetime.fromtimestamp(
+            self.coordinator.to_local_ms(end_ms) / 1000, tz=UTC
+        )
+
+
+class TimerlyRemainingSensor(TimerlyEntity, SensorEntity):
+    """Live countdown computed locally from end_ms.
+
+    While a timer runs, one scheduler job per device re-writes the state on
+    each whole second of the countdown; nothing is polled from the device and
+    the job stops as soon as the timer ends.
+    """
+
+    def __init__(self, coordinator: TimerlyCoordinator, config_entry):
+        super().__init__(coordinator, config_entry)
+        self._attr_name = "Time remaining"
+        self._attr_icon = "mdi:timer-outline"
+        self._attr_unique_id = f"{coordinator.device.unique_id}_remaining"
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+
+    @property
+    def available(self):
+        return (
+            self.coordinator.data is not None and self.coordinator.last_update_success
         )
+
+    def _remaining_ms(self) -> int:
+        if self.coordinator.data is None:
+            return 0
+        end_ms = self.coordinator.data.get("end_ms")
+        if not end_ms:
+            return 0
+        return max(int(self.coordinator.to_local_ms(end_ms) - time.time() * 1000), 0)
+
+    @property
+    def native_value(self):
+        # Round up so the display reads 1 during the final second, not 0
+        return -(-self._remaining_ms() // 1000)
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            lambda: self.coordinator.scheduler.cancel(SCHEDULER_JOB_COUNTDOWN_TICK)
+        )
+        self._schedule_tick()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._schedule_tick()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _schedule_tick(self) -> None:
+        remaining_ms = self._remaining_ms()
+        if remaining_ms <= 0:
+            self.coordinator.scheduler.cancel(SCHEDULER_JOB_COUNTDOWN_TICK)
+            return
+        # Land on the next whole-second boundary of the countdown
+        delay_ms = remaining_ms % 1000 or 1000
+        self.coordinator.scheduler.schedule(
+            SCHEDULER_JOB_COUNTDOWN_TICK,
+            datetime.now(UTC) + timedelta(milliseconds=delay_ms),
+            self._async_tick,
+        )
+
+    @callback
+    def _async_tick(self) -> None:
+        self.async_write_ha_state()
+        self._schedule_tick()
@@ -0,0 +1,513 @@
+"""Local relay for doorbell and notification media.
+
+Each message's image/audio/video URIs are swapped for a one-off URL on Home
+Assistant, so every screen showing that message is served from a single
+upstream fetch. Small responses, including ones sent without a
+Content-Length, are kept in a bounded LRU cache; larger ones are read once
+and replayed from the start to every screen watching at the time, within
+the same byte budget, and anything bigger than the whole budget is streamed
+to each screen directly. Live streams (video, audio or MJPEG without a
+Content-Length) get one upstream connection fanned out to every viewer.
+HLS/DASH playlists are left alone (or redirected), since their segment
+URIs are relative to the origin.
+"""
+
+import asyncio
+from collections import OrderedDict
+from contextlib import aclosing
+import logging
+import secrets
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.network import NoURLAvailableError, get_url
+
+from .const import (
+    CONF_MEDIA_RELAY,
+    DOMAIN,
+    MEDIA_CACHE_MAX_BYTES,
+    MEDIA_CACHE_MAX_ITEM_BYTES,
+    MEDIA_FETCH_TIMEOUT_SEC,
+    MEDIA_LIVE_CHUNK_BYTES,
+    MEDIA_LIVE_IDLE_SEC,
+    MEDIA_LIVE_QUEUE_CHUNKS,
+    MEDIA_LIVE_TYPES,
+    MEDIA_PLAYLIST_SUFFIXES,
+    MEDIA_PLAYLIST_TYPES,
+    MEDIA_PREFETCH_KEYS,
+    MEDIA_TOKEN_TTL_SEC,
+    MEDIA_URI_KEYS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+MEDIA_VIEW_URL = "/api/timerly/media/{token}"
+
+
+def media_relay_enabled(entry: ConfigEntry) -> bool:
+    return entry.options.get(CONF_MEDIA_RELAY, False)
+
+
+class _LiveStream:
+    """One upstream response copied to every subscribed viewer."""
+
+    def __init__(self, response: aiohttp.ClientResponse, on_done):
+        self.content_type = response.headers.get("Content-Type")
+        self._response = response
+        self._subscribers: set[asyncio.Queue] = set()
+        self._on_done = on_done
+        self._idle_since = time.monotonic()
+        self.task: asyncio.Task | None = None
+
+    def subscribe(self, hass: HomeAssistant) -> asyncio.Queue:
+        queue = asyncio.Queue(MEDIA_LIVE_QUEUE_CHUNKS)
+        self._subscribers.add(queue)
+        if self.task is None:
+            # Start reading only once someone is listening, so nothing is lost
+            self.task = hass.async_create_background_task(
+                self.pump(), f"{DOMAIN} live media"
+            )
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        if not self._subscribers:
+            self._idle_since = time.monotonic()
+
+    def _drop(self, queue: asyncio.Queue) -> None:
+        # A viewer too slow to keep up is cut off rather than stalling the rest
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def close(self) -> None:
+        self._response.close()
+
+    async def pump(self) -> None:
+        try:
+            async for chunk in self._response.content.iter_chunked(
+                MEDIA_LIVE_CHUNK_BYTES
+            ):
+                if not self._subscribers:
+                    if time.monotonic() - self._idle_since > MEDIA_LIVE_IDLE_SEC:
+                        break
+                    continue
+                for queue in list(self._subscribers):
+                    try:
+                        queue.put_nowait(chunk)
+                    except asyncio.QueueFull:
+                        self._drop(queue)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            _LOGGER.debug("📺 Live media stream ended: %s", e)
+        finally:
+            self._response.close()
+            for queue in list(self._subscribers):
+                self._drop(queue)
+            self._on_done()
+
+
+class _SharedBody:
+    """One upstream read of a body too big to cache, replayed to each viewer.
+
+    Screens that ask while the download or another screen's playback is
+    still going replay from the first byte. The chunks count against the
+    relay's byte budget and are dropped once the download has finished and
+    the last viewer is done; a screen asking after that starts a new fetch.
+    """
+
+    def __init__(self, response: aiohttp.ClientResponse, on_chunk, on_done):
+        self.content_type = response.headers.get("Content-Type")
+        self.content_length = response.content_length
+        self._response = response
+        self._chunks: list[bytes] = []
+        self._size = 0
+        self._more = asyncio.Event()
+        self._complete = False
+        self._released = False
+        self._viewers = 0
+        self._on_chunk = on_chunk
+        self._on_done = on_done
+        self.task: asyncio.Task | None = None
+
+    def start(self, hass: HomeAssistant) -> None:
+        if self.task is None:
+            self.task = hass.async_create_background_task(
+                self._pump(), f"{DOMAIN} shared media"
+            )
+
+    def close(self) -> None:
+        self._response.close()
+        self._release()
+
+    def _release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._chunks = []
+        self._on_done(self._size)
+
+    async def _pump(self) -> None:
+        try:
+            async for chunk in self._response.content.iter_chunked(
+                MEDIA_LIVE_CHUNK_BYTES
+            ):
+                self._chunks.append(chunk)
+                self._size += len(chunk)
+                self._on_chunk(len(chunk))
+                self._more.set()
+                self._more = asyncio.Event()
+        except (aiohttp.ClientError, TimeoutError) as e:
+            _LOGGER.warning("❌ Shared media download ended early: %s", e)
+        finally:
+            self._response.close()
+            self._complete = True
+            self._more.set()
+            if not self._viewers:
+                self._release()
+
+    async def iter_chunks(self):
+        self._viewers += 1
+        try:
+            index = 0
+            while True:
+                while index < len(self._chunks):
+                    yield self._chunks[index]
+                    index += 1
+                if self._complete:
+                    return
+                await self._more.wait()
+        finally:
+            self._viewers -= 1
+            if self._complete and not self._viewers:
+                self._release()
+
+
+class _Passthrough:
+    """An upstream response streamed to a single viewer, nothing kept."""
+
+    def __init__(
+        self, response: aiohttp.ClientResponse, prefix: list[bytes] | None = None
+    ):
+        self.content_type = response.headers.get("Content-Type")
+        self.content_length = response.content_length
+        self._response = response
+        self._prefix = prefix or []
+
+    async def iter_chunks(self):
+        try:
+            for chunk in self._prefix:
+                yield chunk
+            async for chunk in self._response.content.iter_chunked(
+                MEDIA_LIVE_CHUNK_BYTES
+            ):
+                yield chunk
+        finally:
+            self._response.close()
+
+
+class _Media:
+    __slots__ = (
+        "url",
+        "created",
+        "lock",
+        "content_type",
+        "body",
+        "live",
+        "shared",
+        "playlist",
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.created = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.content_type: str | None = None
+        self.body: bytes | None = None
+        self.live: _LiveStream | None = None
+        self.shared: _SharedBody | None = None
+        self.playlist = False
+
+
+class TimerlyMediaRelay:
+    """Token -> upstream media, with an LRU byte budget for cached bodies."""
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self._media: OrderedDict[str, _Media] = OrderedDict()
+        self._cached_bytes = 0
+        self.upstream_fetches = 0
+        self.cache_hits = 0
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - MEDIA_TOKEN_TTL_SEC
+        for token in [t for t, m in self._media.items() if m.created < cutoff]:
+            self._forget(token)
+        # Shared downloads free their bytes themselves once nobody is reading
+        for token in [t for t, m in self._media.items() if m.body is not None]:
+            if self._cached_bytes <= MEDIA_CACHE_MAX_BYTES:
+                break
+            self._forget(token)
+
+    def _forget(self, token: str) -> None:
+        media = self._media.pop(token)
+        if media.body is not None:
+            self._cached_bytes -= len(media.body)
+        for stream in (media.live, media.shared):
+            if stream is None:
+                continue
+            if stream.task:
+                stream.task.cancel()
+            else:
+                stream.close()
+
+    @callback
+    def async_rewrite(self, payload: dict) -> dict:
+        """Point the payload's media URIs at the relay.
+
+        Images and audio are fetched straight away so the first screen to ask
+        does not wait on the origin; video is opened on first request.
+        """
+        try:
+            base_url = get_url(self._hass, allow_external=False)
+        except NoURLAvailableError:
+            _LOGGER.warning("⚠️ No local Home Assistant URL; not relaying media")
+            return payload
+
+        self._prune()
+        payload = dict(payload)
+        for key in MEDIA_URI_KEYS:
+            url = payload.get(key)
+            if not url or not url.startswith(("http://", "https://")):
+                continue
+            if urlsplit(url).path.lower().endswith(MEDIA_PLAYLIST_SUFFIXES):
+                continue
+            token = secrets.token_urlsafe(16)
+            self._media[token] = _Media(url)
+            payload[key] = base_url + MEDIA_VIEW_URL.format(token=token)
+            if key in MEDIA_PREFETCH_KEYS:
+                self._hass.async_create_background_task(
+                    self._async_prefetch(token), f"{DOMAIN} media prefetch"
+                )
+        return payload
+
+    async def _async_prefetch(self, token: str) -> None:
+        await self._async_open(token, prefetch=True)
+
+    def _add_bytes(self, size: int) -> None:
+        self._cached_bytes += size
+
+    async def _async_open(self, token: str, prefetch: bool = False):
+        """Return the cached media, a live stream, a shared download or a
+        direct stream for this viewer only.
+
+        A prefetch only fills the cache; anything too big for it is opened
+        again when a screen asks, so nothing is held in the meantime.
+        """
+        media = self._media.get(token)
+        if media is None:
+            return None
+        async with media.lock:
+            if media.body is not None or media.playlist:
+                self._media.move_to_end(token)
+                self.cache_hits += 1
+                return media
+            if media.live is not None:
+                return media.live
+            if media.shared is not None:
+                return media.shared
+
+            self.upstream_fetches += 1
+            session = async_get_clientsession(self._hass)
+            try:
+                response = await session.get(
+                    media.url,
+                    timeout=aiohttp.ClientTimeout(
+                        total=None,
+                        sock_connect=MEDIA_FETCH_TIMEOUT_SEC,
+                        sock_read=MEDIA_FETCH_TIMEOUT_SEC,
+                    ),
+                )
+                response.raise_for_status()
+            except (aiohttp.ClientError, TimeoutError) as e:
+                _LOGGER.warning("❌ Could not fetch media %s - %s", media.url, e)
+                return None
+
+            content_type = response.headers.get("Content-Type", "")
+            mime = content_type.split(";")[0].strip().lower()
+            if mime in MEDIA_PLAYLIST_TYPES:
+                # Segment URIs are relative to the origin; send viewers there
+                response.close()
+                media.playlist = True
+                return media
+            length = response.content_length
+            if length is None and mime.startswith(MEDIA_LIVE_TYPES):
+                media.live = _LiveStream(response, lambda: self._end_live(token))
+                return media.live
+            if length is not None and length > MEDIA_CACHE_MAX_ITEM_BYTES:
+                if prefetch:
+                    response.close()
+                    return None
+                if length > MEDIA_CACHE_MAX_BYTES:
+                    # More than the whole budget; not worth holding for sharing
+                    return _Passthrough(response)
+                media.shared = _SharedBody(
+                    response,
+                    self._add_bytes,
+                    lambda size: self._end_shared(token, size),
+                )
+                return media.shared
+
+            # Small, or of unknown length such as a chunked camera snapshot
+            chunks = []
+            size = 0
+            try:
+                async with asyncio.timeout(MEDIA_FETCH_TIMEOUT_SEC):
+                    async for chunk in response.content.iter_chunked(
+                        MEDIA_LIVE_CHUNK_BYTES
+                    ):
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        if size > MEDIA_CACHE_MAX_ITEM_BYTES:
+                            break
+            except (aiohttp.ClientError, TimeoutError) as e:
+                response.close()
+                _LOGGER.warning("❌ Could not fetch media %s - %s", media.url, e)
+                return None
+            if size > MEDIA_CACHE_MAX_ITEM_BYTES:
+                # Bigger than the cache takes; this viewer gets the rest directly
+                if prefetch:
+                    response.close()
+                    return None
+                return _Passthrough(response, chunks)
+            response.release()
+            media.body = b"".join(chunks)
+            media.content_type = response.headers.get("Content-Type")
+            self._cached_bytes += len(media.body)
+            self._media.move_to_end(token)
+            self._prune()
+            return media
+
+    def _end_live(self, token: str) -> None:
+        if media := self._media.get(token):
+            media.live = None
+
+    def _end_shared(self, token: str, size: int) -> None:
+        self._cached_bytes -= size
+        if media := self._media.get(token):
+            media.shared = None
+
+    async def async_serve(self, request: web.Request, token: str):
+        source = await self._async_open(token)
+        if source is None:
+            return web.Response(status=404)
+
+        if isinstance(source, _Media) and source.playlist:
+            return web.Response(status=302, headers={"Location": source.url})
+
+        if isinstance(source, _Media):
+            return web.Response(
+                body=source.body,
+                headers={
+                    "Content-Type": source.content_type or "application/octet-stream"
+                },
+            )
+
+        if isinstance(source, _LiveStream):
+            queue = source.subscribe(self._hass)
+            try:
+                stream = web.StreamResponse(
+                    headers={
+                        "Content-Type": source.content_type
+                        or "application/octet-stream"
+                    }
+                )
+                await stream.prepare(request)
+                while (chunk := await queue.get()) is not None:
+                    await stream.write(chunk)
+                return stream
+            finally:
+                source.unsubscribe(queue)
+
+        # Large body: the shared download, or a stream for this viewer only
+        if isinstance(source, _SharedBody):
+            source.start(self._hass)
+        stream = web.StreamResponse(
+            headers={"Content-Type": source.content_type or "application/octet-stream"}
+        )
+        stream.content_length = source.content_length
+        await stream.prepare(request)
+        async with aclosing(source.iter_chunks()) as chunks:
+            async for chunk in chunks:
+                await stream.write(chunk)
+        return stream
+
+    def as_dict(self) -> dict:
+        return {
+            "tokens": len(self._media),
+            "cached_bytes": self._cached_bytes,
+            "upstream_fetches": self.upstream_fetches,
+            "cache_hits": self.cache_hits,
+            "live_streams": sum(1 for m in self._media.values() if m.live),
+            "shared_downloads": sum(1 for m in self._media.values() if m.shared),
+        }
+
+    def shutdown(self) -> None:
+        for token in list(self._media):
+            self._forget(token)
+
+
+class TimerlyMediaView(HomeAssistantView):
+    """Serve relayed media to the TVs, which cannot send HA credentials.
+
+    Tokens are random, single-message and expire after MEDIA_TOKEN_TTL_SEC.
+    """
+
+    url = MEDIA_VIEW_URL
+    name = "api:timerly:media"
+    requires_auth = False
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+
+    async def get(self, request: web.Request, token: str):
+        relay = get_media_relay(self._hass)
+        if relay is None:
+            return web.Response(status=404)
+        return await relay.async_serve(request, token)
+
+
+def get_media_relay(hass: HomeAssistant) -> TimerlyMediaRelay | None:
+    """Return the media relay, or None when the option is off."""
+    return hass.data.get(DOMAIN, {}).get("media_relay")
+
+
+@callback
+def async_relay_media(hass: HomeAssistant, payload: dict) -> dict:
+    """Rewrite payload media URIs through the relay when it is enabled."""
+    if relay := get_media_relay(hass):
+        return relay.async_rewrite(payload)
+    return payload
+
+
+def async_setup_media(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    if not media_relay_enabled(entry):
+        return
+    if not hass.data[DOMAIN].get("media_view_registered"):
+        # Views cannot be removed, so register once and gate on the option
+        hass.http.register_view(TimerlyMediaView(hass))
+        hass.data[DOMAIN]["media_view_registered"] = True
+    hass.data[DOMAIN]["media_relay"] = TimerlyMediaRelay(hass)
+
+
+def async_unload_media(hass: HomeAssistant) -> None:
+    relay = hass.data.get(DOMAIN, {}).pop("media_relay", None)
+    if relay:
+        relay.shutdown()
@@ -1,10 +1,14 @@
 import logging
-from http import HTTPStatus
 
-from homeassistant.components.notify import BaseNotificationService
+import voluptuous as vol
+
 from homeassistant.core import HomeAssistant
-from .discovery import get_discovered_devices
-import aiohttp
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.json import json_bytes
+from .broadcast import OUTCOME_DELIVERED, async_post_to_hosts
+from .discovery import get_device_index, get_discovered_devices
+from .media import async_relay_media
+from .outbox import get_outbox
 
 from homeassistant.components.notify import (
     ATTR_DATA,
@@ -14,7 +18,14 @@ from homeassistant.components.notify import (
     PLATFORM_SCHEMA,
     BaseNotificationService,
 )
-from homeassistant.const import ATTR_ICON
+from homeassistant.const import (
+    ATTR_AREA_ID,
+    ATTR_DEVICE_ID,
+    ATTR_ENTITY_ID,
+    ATTR_FLOOR_ID,
+    ATTR_ICON,
+    ATTR_LABEL_ID,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,6 +50,34 @@ ATTR_AUDIO_URI = "audioUri"
 ATTR_VIDEO_URI = "videoUri"
 ATTR_IMAGE_URI = "imageUri"
 
+TARGET_KEYS = (ATTR_AREA_ID, ATTR_DEVICE_ID, ATTR_FLOOR_ID, ATTR_LABEL_ID)
+
+_number = vol.Any(int, float, vol.Coerce(int), vol.Coerce(float))
+
+# Validated once per message; unknown keys (including the target keys,
+# which are read separately) are dropped rather than sent to the device
+NOTIFY_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_NAME): cv.string,
+        vol.Optional(ATTR_TYPE): cv.string,
+        vol.Optional(ATTR_POSITION): cv.string,
+        vol.Optional(ATTR_DURATION): _number,
+        vol.Optional(ATTR_VOICE_MESSAGE_ENABLED): cv.boolean,
+        vol.Optional(ATTR_VOICE_MESSAGE): cv.string,
+        vol.Optional(ATTR_VOICE_MESSAGE_DELAY): _number,
+        vol.Optional(ATTR_FLASH_ANIMATION_ENABLED): cv.boolean,
+        vol.Optional(ATTR_FLASH_ANIMATION_REPEAT_COUNT): _number,
+        vol.Optional(ATTR_FLASH_ANIMATION_DELAY): _number,
+        vol.Optional(ATTR_NOTIFICATION_SOUND_ENABLED): cv.boolean,
+        vol.Optional(ATTR_NOTIFICATION_SOUND): cv.string,
+        vol.Optional(ATTR_NOTIFICATION_SOUND_NAME): cv.string,
+        vol.Optional(ATTR_AUDIO_URI): cv.string,
+        vol.Optional(ATTR_IMAGE_URI): cv.string,
+        vol.Optional(ATTR_VIDEO_URI): cv.string,
+    },
+    extra=vol.REMOVE_EXTRA,
+)
+
 
 from .const import DOMAIN
 
@@ -46,7 +85,7 @@ from .const import DOMAIN
 # ✅ Home Assistant calls this to get your service
 async def async_get_service(hass: HomeAssistant, config, discovery_info=None):
     service_name = config.get("name", "timerly")
-    service = TimerlyNotificationService()
+    service = TimerlyNotificationService(hass)
 
     # Save service name so we can unregister it later
     hass.data.setdefault(DOMAIN, {})
@@ -57,66 +96,45 @@ async def async_get_service(hass: HomeAssistant, config, discovery_info=None):
 
 
 class TimerlyNotificationService(BaseNotificationService):
-    def __init__(self):
-        self._session = aiohttp.ClientSession()
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
 
     async def async_send_message(self, message="", **kwargs):
-        title = kwargs.get(ATTR_TITLE, "")
         data = kwargs.get(ATTR_DATA) or {}
 
-        allowed_keys = [
-            ATTR_NAME,
-            ATTR_TYPE,
-            ATTR_POSITION,
-            ATTR_DURATION,
-            ATTR_VOICE_MESSAGE_ENABLED,
-            ATTR_VOICE_MESSAGE,
-            ATTR_VOICE_MESSAGE_DELAY,
-            ATTR_FLASH_ANIMATION_ENABLED,
-            ATTR_FLASH_ANIMATION_REPEAT_COUNT,
-            ATTR_FLASH_ANIMATION_DELAY,
-            ATTR_NOTIFICATION_SOUND_ENABLED,
-            ATTR_NOTIFICATION_SOUND,
-            ATTR_NOTIFICATION_SOUND_NAME,
-            ATTR_AUDIO_URI,
-            ATTR_IMAGE_URI,
-            ATTR_VIDEO_URI,
-        ]
-        
-        payload = {key: data[key] for key in allowed_keys if key in data}
-        payload[ATTR_TITLE] = title
+        payload = NOTIFY_DATA_SCHEMA(data)
+        payload[ATTR_TITLE] = kwargs.get(ATTR_TITLE, "")
         payload[ATTR_TEXT] = message
-
-        all_devices = get_discovered_devices().values()
-    
-        if targets:
-            # Filter to only devices whose binary_sensor entity_id is in targets
-            hosts = [
-                h for h in all_devices
-                if f"binary_sensor.{h['device'].name.lower().replace(' ', '_')}_timer"
-                in targets
-            ]
-        else:
-            hosts = all_devices
-    
-        await self.post_to_hosts(hosts, "alert", payload)
+        payload = async_relay_media(self._hass, payload)
+
+        target = {key: data[key] for key in TARGET_KEYS if key in data}
+        if entity_ids := kwargs.get(ATTR_TARGET):
+            target[ATTR_ENTITY_ID] = entity_ids
+        hosts = get_device_index().resolve_targets(target)
+        if hosts is None:
+            hosts = get_discovered_devices().values()
+
+        results = await self.post_to_hosts(hosts, "alert", payload)
+        failed = [r for r in results if r["outcome"] != OUTCOME_DELIVERED]
+        for result in failed:
+            _LOGGER.warning(
+                "⚠️ Notification not delivered to %s: %s (%s)",
+                result["device"],
+                result["outcome"],
+                result["error"],
+            )
+        _LOGGER.debug(
+            "🔔 Notification delivered to %d/%d device(s)",
+            len(results) - len(failed),
+            len(results),
+        )
+        return results
 
     async def post_to_hosts(self, hosts, endpoint: str, payload: dict):
-        for host in hosts:
-            try:
-                uri = (
-                    f"http://{host['device'].address}:{host['device'].port}/{endpoint}"
-                )
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(uri, json=payload, timeout=5) as response:
-                        if response.status != 200:
-                            _LOGGER.error(
-                                "Timerly %s failed for %s: %s",
-                                uri,
-                                host["device"].name,
-                                response.status,
-                            )
-            except Exception as e:
-                _LOGGER.exception(
-                    "Error sending %s to %s - %s", endpoint, host["device"].name, e
-                )
+        # Serialize once; every device gets the same buffer
+        results = await async_post_to_hosts(
+            self._hass, hosts, endpoint, json_bytes(payload)
+        )
+        if outbox := get_outbox(self._hass):
+            outbox.async_queue_undelivered(results, endpoint, payload)
+        return results
@@ -0,0 +1,211 @@
+"""Persistent per-device queue for commands sent while a device is offline."""
+
+import logging
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .broadcast import (
+    OUTCOME_DELIVERED,
+    OUTCOME_FAILED,
+    OUTCOME_UNREACHABLE,
+    async_post_to_hosts,
+)
+from .const import (
+    CONF_OFFLINE_QUEUE,
+    DOMAIN,
+    OUTBOX_MAX_PER_DEVICE,
+    OUTBOX_SAVE_DELAY_SEC,
+    OUTBOX_STORE_KEY,
+    OUTBOX_STORE_VERSION,
+    OUTBOX_TTL_SEC,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def offline_queue_enabled(entry: ConfigEntry) -> bool:
+    return entry.options.get(CONF_OFFLINE_QUEUE, False)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _should_queue(result: dict) -> bool:
+    """Queue sends the device never answered; it did not reject them."""
+    if result["outcome"] == OUTCOME_UNREACHABLE:
+        return True
+    status = result["status"]
+    return result["outcome"] == OUTCOME_FAILED and (status is None or status >= 500)
+
+
+def _expires_ms(endpoint: str, payload: dict, now_ms: int) -> int | None:
+    if endpoint == "timer":
+        start_ms = payload.get("startTime", now_ms)
+        return int(start_ms + payload["seconds"] * 1000)
+    ttl = OUTBOX_TTL_SEC.get(endpoint)
+    return None if ttl is None else now_ms + ttl * 1000
+
+
+class TimerlyOutbox:
+    """Commands waiting for their device to come back, persisted via Store.
+
+    Each entry expires after OUTBOX_TTL_SEC for its endpoint; a timer stays
+    valid until its own end time and is re-sent with the seconds remaining
+    at delivery.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self._store = Store(hass, OUTBOX_STORE_VERSION, OUTBOX_STORE_KEY)
+        self._queues: dict[str, list[dict]] = {}
+        self._draining: set[str] = set()
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load() or {}
+        self._queues = {
+            name: queue for name, queue in data.get("queues", {}).items() if queue
+        }
+        self._prune()
+        _LOGGER.debug("💾 Restored %d queued Timerly command(s)", len(self))
+
+    async def async_save(self) -> None:
+        await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict:
+        return {"queues": self._queues}
+
+    @callback
+    def _schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, OUTBOX_SAVE_DELAY_SEC)
+
+    def _prune(self) -> None:
+        now_ms = _now_ms()
+        for name in list(self._queues):
+            queue = [
+                item
+                for item in self._queues[name]
+                if item["expires_ms"] is None or item["expires_ms"] > now_ms
+            ]
+            if queue:
+                self._queues[name] = queue
+            else:
+                del self._queues[name]
+
+    def pending(self, device_name: str) -> list[dict]:
+        return list(self._queues.get(device_name, []))
+
+    @callback
+    def async_enqueue(self, device_name: str, endpoint: str, payload: dict) -> None:
+        now_ms = _now_ms()
+        queue = self._queues.setdefault(device_name, [])
+        if endpoint == "timer" or (endpoint == "cancel" and not payload.get("name")):
+            # A newer timer or a cancel makes any queued timer obsolete
+            queue[:] = [item for item in queue if item["endpoint"] != "timer"]
+        queue.append(
+            {
+                "endpoint": endpoint,
+                "payload": payload,
+                "queued_ms": now_ms,
+                "expires_ms": _expires_ms(endpoint, payload, now_ms),
+            }
+        )
+        del queue[:-OUTBOX_MAX_PER_DEVICE]
+        _LOGGER.info(
+            "📥 Queued %s for offline %s (%d waiting)", endpoint, device_name, len(queue)
+        )
+        self._schedule_save()
+
+    @callback
+    def async_queue_undelivered(
+        self, results: list[dict], endpoint: str, payload: dict
+    ) -> None:
+        for result in results:
+            if _should_queue(result):
+                self.async_enqueue(result["device"], endpoint, payload)
+
+    @callback
+    def async_drain(self, device_name: str) -> None:
+        """Start delivering a device's queue if it has one."""
+        if device_name not in self._queues or device_name in self._draining:
+            return
+        self._draining.add(device_name)
+        self._hass.async_create_background_task(
+            self._async_drain(device_name), f"{DOMAIN} drain {device_name}"
+        )
+
+    async def _async_drain(self, device_name: str) -> None:
+        try:
+            self._prune()
+            entry = self._hass.data[DOMAIN].get("discovered", {}).get(device_name)
+            if entry is None:
+                return
+            delivered = 0
+            while self._queues.get(device_name):
+                item = self._queues[device_name][0]
+                payload = dict(item["payload"])
+                if item["endpoint"] == "timer":
+                    now_ms = _now_ms()
+                    remaining = (item["expires_ms"] - now_ms) // 1000
+                    if remaining <= 0:
+                        self._queues[device_name].pop(0)
+                        continue
+                    payload["seconds"] = remaining
+                    payload["startTime"] = now_ms
+                results = await async_post_to_hosts(
+                    self._hass, [entry], item["endpoint"], payload
+                )
+                if _should_queue(results[0]):
+                    # Still offline; try again next time it shows up
+                    break
+                queue = self._queues.get(device_name, [])
+                if queue and queue[0] is item:
+                    queue.pop(0)
+                delivered += results[0]["outcome"] == OUTCOME_DELIVERED
+            if not self._queues.get(device_name):
+                self._queues.pop(device_name, None)
+            if delivered:
+                _LOGGER.info(
+                    "📤 Delivered %d queued command(s) to %s", delivered, device_name
+                )
+                coordinator = self._hass.data[DOMAIN].get("coordinators", {}).get(
+                    device_name
+                )
+                if coordinator:
+                    coordinator.async_command_sent()
+                    await coordinator.async_request_refresh()
+            self._schedule_save()
+        finally:
+            self._draining.discard(device_name)
+
+
+def get_outbox(hass: HomeAssistant) -> TimerlyOutbox | None:
+    """Return the offline queue, or None when the option is off."""
+    return hass.data.get(DOMAIN, {}).get("outbox")
+
+
+async def async_setup_outbox(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    if not offline_queue_enabled(entry):
+        return
+    outbox = TimerlyOutbox(hass)
+    await outbox.async_load()
+    hass.data[DOMAIN]["outbox"] = outbox
+
+
+async def async_unload_outbox(hass: HomeAssistant) -> None:
+    outbox = hass.data.get(DOMAIN, {}).pop("outbox", None)
+    if outbox:
+        await outbox.async_save()
+
+
+@callback
+def async_drain_outbox(hass: HomeAssistant, device_name: str) -> None:
+    """Deliver queued commands now that the device has been seen."""
+    if outbox := get_outbox(hass):
+        outbox.async_drain(device_name)
@@ -0,0 +1,82 @@
+"""Webhook receiver for devices that push their timer state."""
+
+import logging
+
+from aiohttp import web
+
+from homeassistant.components import webhook
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PUSH, DOMAIN
+from .TimerlyDevice import TimerlyDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def push_enabled(entry: ConfigEntry | None) -> bool:
+    """Return True if the user has opted in to push updates."""
+    return bool(entry and entry.options.get(CONF_PUSH, False))
+
+
+def get_webhook_id(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}_{entry.entry_id}"
+
+
+def get_webhook_url(hass: HomeAssistant, entry: ConfigEntry) -> str:
+    """Return the local URL devices should POST their timer state to."""
+    return webhook.async_generate_url(
+        hass, get_webhook_id(entry), allow_internal=True, prefer_external=False
+    )
+
+
+def _find_coordinator(hass: HomeAssistant, name: str | None, remote: str | None):
+    coordinators = hass.data.get(DOMAIN, {}).get("coordinators", {})
+    if name:
+        # Devices announce themselves with their mDNS instance name
+        coordinator = coordinators.get(TimerlyDevice(name, "", "").name)
+        if coordinator:
+            return coordinator
+    if remote:
+        for coordinator in coordinators.values():
+            if coordinator.device.address == remote:
+                return coordinator
+    return None
+
+
+async def handle_webhook(hass: HomeAssistant, webhook_id: str, request) -> web.Response:
+    """Feed a pushed /timer payload straight into the device's coordinator."""
+    try:
+        payload = await request.json()
+    except ValueError:
+        _LOGGER.warning("⚠️ Ignoring push with invalid JSON from %s", request.remote)
+        return web.Response(status=400)
+
+    coordinator = _find_coordinator(hass, payload.get("name"), request.remote)
+    if coordinator is None:
+        _LOGGER.debug("⚠️ Push from unknown device %s", request.remote)
+        return web.Response(status=404)
+
+    coordinator.async_handle_push(payload)
+    return web.Response(status=200)
+
+
+def async_setup_push(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    if not push_enabled(entry):
+        return
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        "Timerly",
+        get_webhook_id(entry),
+        handle_webhook,
+        local_only=True,
+    )
+    hass.data[DOMAIN]["webhook_id"] = get_webhook_id(entry)
+    _LOGGER.info("📬 Listening for Timerly pushes at %s", get_webhook_url(hass, entry))
+
+
+def async_unload_push(hass: HomeAssistant) -> None:
+    webhook_id = hass.data.get(DOMAIN, {}).pop("webhook_id", None)
+    if webhook_id:
+        webhook.async_unregister(hass, webhook_id)
@@ -0,0 +1,124 @@
+"""Integration-wide timer heap shared by every Timerly device.
+
+Kept free of Home Assistant imports so it can be benchmarked on a bare
+asyncio loop (see scripts/bench_scheduler.py).
+"""
+
+import asyncio
+from collections.abc import Callable
+from datetime import UTC, datetime
+import heapq
+import inspect
+import itertools
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TimerlyScheduler:
+    """One-shot jobs for the whole fleet, served by a single loop timer.
+
+    Jobs live in a heap keyed by due time. Only one ``loop.call_at`` handle
+    is armed, for the earliest job plus ``tolerance`` seconds, and each
+    wake-up runs every job that has come due, so jobs falling within the
+    tolerance window share one wake-up. Jobs therefore run up to
+    ``tolerance`` late, never early: the loop clock is monotonic, so a job
+    whose due time the wall clock has not reached yet (it was stepped back)
+    is re-armed rather than run. Callbacks run directly on the loop;
+    coroutines they return are handed to ``create_task``.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        tolerance: float,
+        create_task: Callable | None = None,
+    ):
+        self._loop = loop
+        self._tolerance = tolerance
+        self._create_task = create_task or loop.create_task
+        self._heap: list[tuple[float, int, object]] = []
+        self._jobs: dict[object, tuple[float, int, Callable, datetime]] = {}
+        self._seq = itertools.count()
+        self._handle: asyncio.TimerHandle | None = None
+        self._armed_at: float | None = None
+        self.wakeups = 0
+        self.jobs_run = 0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def schedule(self, key, utc_time: datetime, callback: Callable) -> None:
+        """Run ``callback()`` at ``utc_time``, replacing any job with this key."""
+        delay = (utc_time - datetime.now(UTC)).total_seconds()
+        when = self._loop.time() + max(delay, 0)
+        seq = next(self._seq)
+        self._jobs[key] = (when, seq, callback, utc_time)
+        heapq.heappush(self._heap, (when, seq, key))
+        self._arm()
+
+    def cancel(self, key) -> bool:
+        # The heap entry is left behind and skipped when it surfaces
+        return self._jobs.pop(key, None) is not None
+
+    def is_scheduled(self, key) -> bool:
+        return key in self._jobs
+
+    def shutdown(self) -> None:
+        self._jobs.clear()
+        self._heap.clear()
+        if self._handle:
+            self._handle.cancel()
+        self._handle = self._armed_at = None
+
+    def _is_live(self, entry) -> bool:
+        when, seq, key = entry
+        job = self._jobs.get(key)
+        return job is not None and job[1] == seq
+
+    def _arm(self) -> None:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            if self._handle:
+                self._handle.cancel()
+            self._handle = self._armed_at = None
+            return
+        fire_at = self._heap[0][0] + self._tolerance
+        if self._armed_at is not None and self._armed_at <= fire_at:
+            # The armed wake-up already comes first and will pick this up
+            return
+        if self._handle:
+            self._handle.cancel()
+        self._armed_at = fire_at
+        self._handle = self._loop.call_at(fire_at, self._run_due)
+
+    def _run_due(self) -> None:
+        self._handle = self._armed_at = None
+        self.wakeups += 1
+        now = self._loop.time()
+        utc_now = datetime.now(UTC)
+        due = []
+        early = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not self._is_live(entry):
+                continue
+            key = entry[2]
+            _, _, callback, utc_time = self._jobs.pop(key)
+            if utc_time > utc_now:
+                early.append((key, utc_time, callback))
+            else:
+                due.append(callback)
+        for key, utc_time, callback in early:
+            _LOGGER.debug("Wall clock behind job %s, re-arming", key)
+            self.schedule(key, utc_time, callback)
+        for callback in due:
+            self.jobs_run += 1
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    self._create_task(result)
+            except Exception:
+                _LOGGER.exception("Error running scheduled Timerly job")
+        self._arm()
@@ -0,0 +1,20 @@
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .discovery import try_add_new_entities
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    # Per-device sensors are created alongside the timer entities in discovery
+    hass.data[DOMAIN]["async_add_sensor_entities"] = async_add_entities
+    await try_add_new_entities(hass)
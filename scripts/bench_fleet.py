@@ -0,0 +1,312 @@
+"""Load-test the Timerly integration against a simulated device fleet.
+
+Starts N fake Timerly devices (scripts/timerly_sim.py) on localhost, boots a
+throwaway Home Assistant instance with this repository's custom component,
+and measures:
+
+* discovery: time until every device has a coordinator with data
+* polling: device requests per minute while idle, and the share answered
+  304 Not Modified
+* start_timer / doorbell / notify: service-call latency percentiles
+* synchronized start_timer: spread of the end times devices report
+* event-loop blocking: how late a 10 ms heartbeat fires
+* memory: traced Python allocations per device
+
+Each fleet size runs in its own subprocess so measurements do not leak into
+each other. Needs a Home Assistant development environment (the
+``homeassistant`` package), plus aiohttp and zeroconf.
+
+    python scripts/bench_fleet.py --sizes 1,10,100,500
+    python scripts/bench_fleet.py --sizes 10 --latency-ms 50 --check --max-p95-ms 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from timerly_sim import announce, start_fleet
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DOMAIN = "timerly"
+
+CONFIGURATION_YAML = """\
+homeassistant:
+  name: Timerly bench
+  time_zone: UTC
+http:
+  server_host: 127.0.0.1
+  server_port: {http_port}
+logger:
+  default: warning
+notify:
+  - platform: timerly
+    name: timerly
+"""
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 1)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+class LoopMonitor:
+    """Measure event-loop blocking as heartbeat lateness."""
+
+    def __init__(self, interval: float = 0.01):
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+        self.max_lag_ms = 0.0
+        self.total_lag_ms = 0.0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            lag = (loop.time() - expected) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, lag)
+            if lag > 1:
+                self.total_lag_ms += lag
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+async def _timed_calls(hass, count: int, domain: str, service: str, data: dict):
+    latencies = []
+    for _ in range(count):
+        # Identical back-to-back calls would otherwise be dropped as duplicates
+        hass.data.get(DOMAIN, {}).pop("recent_commands", None)
+        started = time.perf_counter()
+        await hass.services.async_call(domain, service, data, blocking=True)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return _percentiles(latencies)
+
+
+async def _boot_hass(config_dir: Path, http_port: int):
+    from homeassistant import bootstrap, runner
+
+    (config_dir / "configuration.yaml").write_text(
+        CONFIGURATION_YAML.format(http_port=http_port)
+    )
+    (config_dir / "custom_components").symlink_to(REPO_ROOT / "custom_components")
+    hass = await bootstrap.async_setup_hass(
+        runner.RuntimeConfig(config_dir=str(config_dir), skip_pip=True)
+    )
+    if hass is None:
+        raise RuntimeError("Home Assistant failed to start")
+    await hass.async_start()
+    return hass
+
+
+async def _wait_for_coordinators(hass, count: int, timeout: float) -> float | None:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        coordinators = hass.data.get(DOMAIN, {}).get("coordinators", {})
+        ready = sum(1 for c in coordinators.values() if c.data is not None)
+        if ready >= count:
+            return round((time.perf_counter() - started) * 1000, 1)
+        await asyncio.sleep(0.05)
+    return None
+
+
+async def run_size(args) -> dict:
+    from custom_components.timerly.discovery import (
+        add_discovered_device,
+        try_add_new_entities,
+    )
+    from custom_components.timerly.TimerlyDevice import TimerlyDevice
+
+    tracemalloc.start()
+    fleet = await start_fleet(
+        args.size,
+        args.base_port,
+        latency_ms=args.latency_ms,
+        failure_rate=args.failure_rate,
+    )
+    azc = None
+    with tempfile.TemporaryDirectory() as tmp:
+        hass = await _boot_hass(Path(tmp), args.base_port - 1)
+        monitor = LoopMonitor()
+        monitor.start()
+        try:
+            await hass.config_entries.flow.async_init(
+                DOMAIN, context={"source": "user"}
+            )
+            await hass.async_block_till_done()
+            mem_before = tracemalloc.get_traced_memory()[0]
+
+            if args.discovery == "mdns":
+                azc = await announce(fleet)
+            else:
+                for device in fleet:
+                    add_discovered_device(
+                        TimerlyDevice(f"Timerly {device.name}", device.host, device.port)
+                    )
+                await try_add_new_entities(hass)
+            discovery_ms = await _wait_for_coordinators(
+                hass, args.size, args.discovery_timeout
+            )
+            await hass.async_block_till_done()
+            mem_per_device = (tracemalloc.get_traced_memory()[0] - mem_before) / max(
+                args.size, 1
+            )
+
+            # Idle polling load
+            for device in fleet:
+                device.request_counts.clear()
+                device.not_modified = 0
+            await asyncio.sleep(args.poll_seconds)
+            polls = sum(d.request_counts["GET", "/timer"] for d in fleet)
+            requests_per_min = polls * 60 / args.poll_seconds
+            not_modified_pct = 100 * sum(d.not_modified for d in fleet) / max(polls, 1)
+
+            start_timer = await _timed_calls(
+                hass, args.calls, DOMAIN, "start_timer", {"seconds": 60}
+            )
+            hass.data[DOMAIN].pop("recent_commands", None)
+            sync = await hass.services.async_call(
+                DOMAIN,
+                "start_timer",
+                {"seconds": 60, "synchronized": True},
+                blocking=True,
+                return_response=True,
+            )
+            doorbell = await _timed_calls(
+                hass, args.calls, DOMAIN, "doorbell", {"duration": 5}
+            )
+            notify = await _timed_calls(
+                hass, args.calls, "notify", "timerly", {"message": "bench"}
+            )
+        finally:
+            monitor.stop()
+            if azc:
+                await azc.async_close()
+            await hass.async_stop()
+            for device in fleet:
+                await device.stop()
+
+    return {
+        "devices": args.size,
+        "discovery_ms": discovery_ms,
+        "requests_per_min": round(requests_per_min, 1),
+        "not_modified_pct": round(not_modified_pct, 1),
+        "start_timer_ms": start_timer,
+        "sync_spread_ms": sync["spread_ms"],
+        "doorbell_ms": doorbell,
+        "notify_ms": notify,
+        "loop_max_lag_ms": round(monitor.max_lag_ms, 1),
+        "loop_total_lag_ms": round(monitor.total_lag_ms, 1),
+        "memory_per_device_kb": round(mem_per_device / 1024, 1),
+    }
+
+
+def _print_table(results: list[dict]) -> None:
+    print(
+        f"{'devices':>7} {'disc ms':>8} {'req/min':>8} "
+        f"{'start p50/p95':>14} {'bell p50/p95':>13} {'notify p50/p95':>15} "
+        f"{'lag max':>8} {'KiB/dev':>8}"
+    )
+    for r in results:
+
+        def pair(key):
+            return f"{r[key]['p50']}/{r[key]['p95']}"
+
+        print(
+            f"{r['devices']:>7} {r['discovery_ms']!s:>8} {r['requests_per_min']:>8} "
+            f"{pair('start_timer_ms'):>14} {pair('doorbell_ms'):>13} "
+            f"{pair('notify_ms'):>15} {r['loop_max_lag_ms']:>8} "
+            f"{r['memory_per_device_kb']:>8}"
+        )
+
+
+def _check(results: list[dict], args) -> list[str]:
+    failures = []
+    for r in results:
+        if r["discovery_ms"] is None:
+            failures.append(f"{r['devices']} devices: discovery did not complete")
+        for key in ("start_timer_ms", "doorbell_ms", "notify_ms"):
+            p95 = r[key]["p95"]
+            if p95 is not None and p95 > args.max_p95_ms:
+                failures.append(
+                    f"{r['devices']} devices: {key} p95 {p95} ms > {args.max_p95_ms}"
+                )
+        if r["loop_max_lag_ms"] > args.max_loop_lag_ms:
+            failures.append(
+                f"{r['devices']} devices: loop lag {r['loop_max_lag_ms']} ms"
+                f" > {args.max_loop_lag_ms}"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100,500")
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--base-port", type=int, default=19000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--discovery", choices=("direct", "mdns"), default="direct")
+    parser.add_argument("--discovery-timeout", type=float, default=60)
+    parser.add_argument("--poll-seconds", type=float, default=30)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    parser.add_argument("--check", action="store_true", help="fail on budget overrun")
+    parser.add_argument("--max-p95-ms", type=float, default=1000)
+    parser.add_argument("--max-loop-lag-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    if args.size is not None:
+        # Child process: one fleet size, JSON on stdout
+        sys.path.insert(0, str(REPO_ROOT))
+        print(json.dumps(asyncio.run(run_size(args))))
+        return
+
+    results = []
+    passthrough = []
+    argv = iter(sys.argv[1:])
+    for arg in argv:
+        if arg == "--sizes":
+            next(argv, None)
+        elif not arg.startswith("--sizes="):
+            passthrough.append(arg)
+    for size in (int(s) for s in args.sizes.split(",")):
+        out = subprocess.run(
+            [sys.executable, __file__, "--size", str(size), *passthrough],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": str(REPO_ROOT)},
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+
+    if args.check:
+        failures = _check(results, args)
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
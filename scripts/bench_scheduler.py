@@ -0,0 +1,106 @@
+"""Compare scheduler wake-ups for a simulated fleet of running timers.
+
+Each simulated device runs a one-second countdown tick at its own phase
+plus an end-of-timer refresh, exactly as the Time remaining sensor and
+coordinator do. The per-device baseline arms one loop timer per job; the
+shared TimerlyScheduler merges jobs that fall within its tolerance window.
+
+    python scripts/bench_scheduler.py --devices 100 --seconds 10
+"""
+
+import argparse
+import asyncio
+from datetime import UTC, datetime, timedelta
+import importlib.util
+from pathlib import Path
+import random
+
+_SCHEDULER_PATH = (
+    Path(__file__).resolve().parents[1] / "custom_components/timerly/scheduler.py"
+)
+
+
+def _load_scheduler():
+    # Load by path: importing the package would pull in Home Assistant
+    spec = importlib.util.spec_from_file_location("timerly_scheduler", _SCHEDULER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.TimerlyScheduler
+
+
+class PerJobScheduler:
+    """Baseline: one loop timer per job, like async_track_point_in_utc_time."""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._handles = {}
+        self.wakeups = 0
+
+    def schedule(self, key, utc_time, callback):
+        self.cancel(key)
+        delay = max((utc_time - datetime.now(UTC)).total_seconds(), 0)
+        self._handles[key] = self._loop.call_later(delay, self._run, key, callback)
+
+    def cancel(self, key):
+        handle = self._handles.pop(key, None)
+        if handle:
+            handle.cancel()
+
+    def _run(self, key, callback):
+        self._handles.pop(key, None)
+        self.wakeups += 1
+        callback()
+
+
+async def _simulate(scheduler, devices: int, seconds: float, seed: int) -> float:
+    rng = random.Random(seed)
+    start = datetime.now(UTC)
+    lateness = []
+
+    def tick(device, due):
+        now = datetime.now(UTC)
+        lateness.append((now - due).total_seconds())
+        nxt = due + timedelta(seconds=1)
+        scheduler.schedule((device, "countdown_tick"), nxt, lambda: tick(device, nxt))
+
+    for device in range(devices):
+        first = start + timedelta(seconds=rng.random())
+        scheduler.schedule(
+            (device, "countdown_tick"), first, lambda d=device, f=first: tick(d, f)
+        )
+        end = start + timedelta(seconds=rng.uniform(1, seconds))
+        scheduler.schedule((device, "end_time_refresh"), end, lambda: None)
+
+    await asyncio.sleep(seconds)
+    for device in range(devices):
+        scheduler.cancel((device, "countdown_tick"))
+    return max(lateness, default=0)
+
+
+async def _main(args):
+    TimerlyScheduler = _load_scheduler()
+    loop = asyncio.get_running_loop()
+
+    baseline = PerJobScheduler(loop)
+    await _simulate(baseline, args.devices, args.seconds, args.seed)
+
+    shared = TimerlyScheduler(loop, args.tolerance)
+    late = await _simulate(shared, args.devices, args.seconds, args.seed)
+    shared.shutdown()
+
+    per_minute = 60 / args.seconds
+    print(f"devices={args.devices} tolerance={args.tolerance}s")
+    print(f"  per-job timers : {baseline.wakeups * per_minute:8.0f} wake-ups/min")
+    print(
+        f"  shared heap    : {shared.wakeups * per_minute:8.0f} wake-ups/min "
+        f"({shared.jobs_run * per_minute:.0f} jobs/min, max lateness {late * 1000:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,302 @@
+"""Stand-in Timerly device server for local development.
+
+Serves the same HTTP API as the TV app (``GET /timer``, ``POST /timer``,
+``/cancel``, ``/doorbell``, ``/alert``) and supports push subscriptions via
+``POST /subscribe``, so the integration can be exercised without real TVs.
+
+    python scripts/timerly_sim.py --name "Office TV" --port 8181
+    python scripts/timerly_sim.py --count 30 --latency-ms 80 --failure-rate 0.05
+
+Point Home Assistant at it by adding the device manually, or announce it
+with mDNS (see ``--announce``).
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+import logging
+import random
+import time
+
+import aiohttp
+from aiohttp import web
+
+_LOGGER = logging.getLogger("timerly_sim")
+
+
+class FakeTimerlyDevice:
+    """In-memory Timerly device exposing the HTTP API on one port."""
+
+    def __init__(
+        self,
+        name: str,
+        port: int,
+        host: str = "127.0.0.1",
+        latency_ms: float = 0,
+        failure_rate: float = 0,
+        timer_seconds: float | None = None,
+        clock_skew_ms: float = 0,
+    ):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        # Answer this many upcoming requests with a 503, then behave again
+        self.fail_next = 0
+        # How far this device's wall clock runs ahead of the host's
+        self.clock_skew_ms = clock_skew_ms
+        self.end_ms: int | None = None
+        self.properties: dict = {}
+        if timer_seconds:
+            self.end_ms = int(self.now_ms() + timer_seconds * 1000)
+            self.properties = {"duration": timer_seconds, "type": "DEFAULT"}
+        self.subscribers: set[str] = set()
+        self.request_counts: Counter[tuple[str, str]] = Counter()
+        self.replayed_commands = 0
+        self.not_modified = 0
+        # Bumped on every timer change; served as the /timer ETag
+        self.version = 0
+        self._seen_keys: set[tuple[str, str]] = set()
+        self._expiry: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._runner: web.AppRunner | None = None
+        self._session: aiohttp.ClientSession | None = None
+
+    # -- timer state --------------------------------------------------------
+
+    def now_ms(self) -> float:
+        return time.time() * 1000 + self.clock_skew_ms
+
+    def timer_payload(self) -> dict | None:
+        if self.end_ms is not None and self.end_ms <= self.now_ms():
+            self._expire()
+        if self.end_ms is None:
+            return None
+        return {
+            "name": f"Timerly {self.name}",
+            "endTime": self.end_ms,
+            "properties": self.properties,
+        }
+
+    def _expire(self):
+        """The running timer ran out: clear it and tell the subscribers."""
+        self.end_ms = None
+        self.properties = {}
+        self.version += 1
+        self._arm_expiry()
+        if self.subscribers:
+            task = asyncio.get_running_loop().create_task(self._push())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _arm_expiry(self):
+        """Wake up when the timer ends on this device's clock, to push it."""
+        if self._expiry:
+            self._expiry.cancel()
+            self._expiry = None
+        if self.end_ms is None or self._runner is None:
+            return
+        delay = max(self.end_ms - self.now_ms(), 0) / 1000
+        self._expiry = asyncio.get_running_loop().call_later(delay, self._on_expiry)
+
+    def _on_expiry(self):
+        self._expiry = None
+        if self.end_ms is None:
+            return
+        if self.end_ms > self.now_ms():
+            # clock_skew_ms moved since the timer was armed
+            self._arm_expiry()
+            return
+        self._expire()
+
+    async def _push(self):
+        payload = self.timer_payload() or {"name": f"Timerly {self.name}"}
+        for url in list(self.subscribers):
+            try:
+                async with self._session.post(url, json=payload, timeout=5) as resp:
+                    _LOGGER.debug("[%s] push -> %s: %s", self.name, url, resp.status)
+            except (aiohttp.ClientError, TimeoutError) as e:
+                _LOGGER.warning("[%s] push to %s failed: %s", self.name, url, e)
+
+    # -- HTTP handlers ------------------------------------------------------
+
+    async def _get_timer(self, request):
+        payload = self.timer_payload()
+        etag = f'"{self.version}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        if payload is None:
+            return web.Response(status=404, headers={"ETag": etag})
+        return web.json_response(payload, headers={"ETag": etag})
+
+    async def _post_timer(self, request):
+        body = await request.json()
+        start_ms = body.get("startTime") or int(self.now_ms())
+        # An absolute endTime (synchronized starts) wins over the duration
+        self.end_ms = int(body.get("endTime") or start_ms + body["seconds"] * 1000)
+        self.properties = {**body, "duration": body["seconds"]}
+        self.version += 1
+        self._arm_expiry()
+        await self._push()
+        return web.Response(status=200)
+
+    async def _post_cancel(self, request):
+        self.end_ms = None
+        self.properties = {}
+        self.version += 1
+        self._arm_expiry()
+        await self._push()
+        return web.Response(status=200)
+
+    async def _post_ack(self, request):
+        await request.read()
+        return web.Response(status=200)
+
+    async def _post_subscribe(self, request):
+        body = await request.json()
+        self.subscribers.add(body["url"])
+        _LOGGER.info("[%s] subscribed %s", self.name, body["url"])
+        return web.Response(status=200)
+
+    @web.middleware
+    async def _record(self, request, handler):
+        self.request_counts[request.method, request.path] += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        response = await self._dispatch(request, handler)
+        response.headers["X-Timerly-Time"] = str(int(self.now_ms()))
+        return response
+
+    async def _dispatch(self, request, handler):
+        if self.fail_next:
+            self.fail_next -= 1
+            return web.Response(status=503)
+        if self.failure_rate and random.random() < self.failure_rate:
+            return web.Response(status=503)
+        key = request.headers.get("Idempotency-Key")
+        if request.method == "POST" and key:
+            if (request.path, key) in self._seen_keys:
+                # A retry of a command already applied: acknowledge, don't redo
+                self.replayed_commands += 1
+                return web.Response(status=200)
+            self._seen_keys.add((request.path, key))
+        return await handler(request)
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._record])
+        app.router.add_get("/timer", self._get_timer)
+        app.router.add_post("/timer", self._post_timer)
+        app.router.add_post("/cancel", self._post_cancel)
+        app.router.add_post("/doorbell", self._post_ack)
+        app.router.add_post("/alert", self._post_ack)
+        app.router.add_post("/subscribe", self._post_subscribe)
+        return app
+
+    async def start(self):
+        self._session = aiohttp.ClientSession()
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self._arm_expiry()
+        _LOGGER.info("[%s] listening on %s:%d", self.name, self.host, self.port)
+
+    async def stop(self):
+        if self._expiry:
+            self._expiry.cancel()
+            self._expiry = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._runner:
+            await self._runner.cleanup()
+        if self._session:
+            await self._session.close()
+
+
+async def start_fleet(
+    count: int,
+    base_port: int,
+    name: str = "Fleet TV",
+    host: str = "127.0.0.1",
+    **options,
+) -> list[FakeTimerlyDevice]:
+    """Start ``count`` fake devices on consecutive ports."""
+    devices = [
+        FakeTimerlyDevice(
+            name if count == 1 else f"{name} {i + 1}", base_port + i, host, **options
+        )
+        for i in range(count)
+    ]
+    await asyncio.gather(*(device.start() for device in devices))
+    return devices
+
+
+async def announce(devices, host: str = "127.0.0.1"):
+    """Announce devices as _tvtimer._tcp services; returns the AsyncZeroconf."""
+    from zeroconf import ServiceInfo
+    from zeroconf.asyncio import AsyncZeroconf
+
+    azc = AsyncZeroconf(interfaces=[host])
+    await asyncio.gather(
+        *(
+            azc.async_register_service(
+                ServiceInfo(
+                    "_tvtimer._tcp.local.",
+                    f"Timerly {device.name}._tvtimer._tcp.local.",
+                    parsed_addresses=[host],
+                    port=device.port,
+                )
+            )
+            for device in devices
+        )
+    )
+    return azc
+
+
+async def _main(args):
+    devices = await start_fleet(
+        args.count,
+        args.port,
+        args.name,
+        args.host,
+        latency_ms=args.latency_ms,
+        failure_rate=args.failure_rate,
+        timer_seconds=args.timer_seconds,
+        clock_skew_ms=args.clock_skew_ms,
+    )
+    azc = await announce(devices, args.host) if args.announce else None
+    try:
+        await asyncio.Event().wait()
+    finally:
+        if azc:
+            await azc.async_close()
+        for device in devices:
+            await device.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--name", default="Office TV")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8181)
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument(
+        "--timer-seconds", type=float, help="start each device with a running timer"
+    )
+    parser.add_argument(
+        "--clock-skew-ms", type=float, default=0, help="run device clocks ahead"
+    )
+    parser.add_argument(
+        "--announce", action="store_true", help="announce devices over mDNS"
+    )
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,104 @@
+"""Shared fixtures for the Timerly tests.
+
+Tests that import the integration need Home Assistant and skip themselves
+when it is not installed; the rest only need the simulator in scripts/.
+"""
+
+import socket
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from timerly_sim import FakeTimerlyDevice
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def allow_sockets(request):
+    """Allow real localhost sockets, which Home Assistant's test plugin blocks."""
+    try:
+        request.getfixturevalue("socket_enabled")
+    except pytest.FixtureLookupError:
+        pass
+
+
+@pytest.fixture
+async def fake_device(allow_sockets):
+    """Start simulated Timerly devices on free ports; all are stopped afterwards."""
+    devices = []
+
+    async def _start(name: str = "Test TV", **options) -> FakeTimerlyDevice:
+        device = FakeTimerlyDevice(name, _free_port(), **options)
+        await device.start()
+        devices.append(device)
+        return device
+
+    yield _start
+    for device in devices:
+        await device.stop()
+
+
+@pytest.fixture
+async def setup_timerly(hass, request):
+    """Set up the integration with mDNS browsing stubbed out.
+
+    Needs pytest-homeassistant-custom-component; the entry is unloaded
+    afterwards if the test left it loaded.
+    """
+    from homeassistant.config_entries import ConfigEntryState
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+    from custom_components.timerly.const import DOMAIN
+
+    request.getfixturevalue("enable_custom_integrations")
+    request.getfixturevalue("mock_async_zeroconf")
+    browser = MagicMock(async_cancel=AsyncMock())
+    entries = []
+
+    async def _setup(options: dict | None = None):
+        entry = MockConfigEntry(domain=DOMAIN, options=options or {})
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        entries.append(entry)
+        return entry
+
+    with patch(
+        "custom_components.timerly.discovery.AsyncServiceBrowser",
+        return_value=browser,
+    ):
+        yield _setup
+        for entry in entries:
+            if entry.state is ConfigEntryState.LOADED:
+                await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+@pytest.fixture
+async def discover_device(hass, fake_device):
+    """Start a simulated device and feed it through discovery, as mDNS would.
+
+    Set the integration up first; returns the device and its coordinator
+    after the first poll.
+    """
+    from custom_components.timerly.const import DOMAIN
+    from custom_components.timerly.discovery import (
+        add_discovered_device,
+        try_add_new_entities,
+    )
+    from custom_components.timerly.TimerlyDevice import TimerlyDevice
+
+    async def _discover(name: str = "Test TV", **options):
+        device = await fake_device(name, **options)
+        add_discovered_device(
+            TimerlyDevice(f"Timerly {device.name}", device.host, device.port)
+        )
+        await try_add_new_entities(hass)
+        await hass.async_block_till_done(wait_background_tasks=True)
+        return device, hass.data[DOMAIN]["coordinators"][device.name]
+
+    return _discover
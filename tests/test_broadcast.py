@@ -0,0 +1,160 @@
+"""async_post_to_hosts against simulated devices: retries, de-dup, clocks."""
+
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.timerly.broadcast import (  # noqa: E402
+    OUTCOME_DELIVERED,
+    OUTCOME_DUPLICATE,
+    OUTCOME_FAILED,
+    OUTCOME_UNREACHABLE,
+    async_post_to_hosts,
+)
+from custom_components.timerly.connection import (  # noqa: E402
+    async_close_connections,
+    get_connection,
+)
+from custom_components.timerly.TimerlyDevice import TimerlyDevice  # noqa: E402
+
+
+def _host(device) -> dict:
+    return {"device": TimerlyDevice(f"Timerly {device.name}", device.host, device.port)}
+
+
+@pytest.fixture(autouse=True)
+async def close_connections(hass):
+    yield
+    await async_close_connections(hass)
+
+
+async def test_delivers_to_every_device(hass, fake_device):
+    devices = [await fake_device(f"TV {i}") for i in range(3)]
+
+    results = await async_post_to_hosts(
+        hass, [_host(d) for d in devices], "doorbell", {"title": "Door"}
+    )
+
+    assert [r["outcome"] for r in results] == [OUTCOME_DELIVERED] * 3
+    for device in devices:
+        assert device.request_counts["POST", "/doorbell"] == 1
+
+
+async def test_identical_command_within_window_is_suppressed(hass, fake_device):
+    device = await fake_device()
+    host = _host(device)
+
+    first = await async_post_to_hosts(hass, [host], "doorbell", {"title": "Door"})
+    second = await async_post_to_hosts(hass, [host], "doorbell", {"title": "Door"})
+    other = await async_post_to_hosts(hass, [host], "doorbell", {"title": "Gate"})
+
+    assert first[0]["outcome"] == OUTCOME_DELIVERED
+    assert second[0]["outcome"] == OUTCOME_DUPLICATE
+    assert other[0]["outcome"] == OUTCOME_DELIVERED
+    assert device.request_counts["POST", "/doorbell"] == 2
+
+
+async def test_start_cancel_start_sends_both_starts(hass, fake_device):
+    device = await fake_device()
+    host = _host(device)
+    timer = {"seconds": 60, "startTime": int(time.time() * 1000)}
+
+    first = await async_post_to_hosts(hass, [host], "timer", timer)
+    await async_post_to_hosts(hass, [host], "cancel", {})
+    again = await async_post_to_hosts(hass, [host], "timer", dict(timer))
+
+    assert first[0]["outcome"] == OUTCOME_DELIVERED
+    assert again[0]["outcome"] == OUTCOME_DELIVERED
+    assert device.end_ms is not None
+
+
+async def test_slow_device_gets_the_whole_deadline_and_no_retry(hass, fake_device):
+    device = await fake_device(latency_ms=2000)
+
+    results = await async_post_to_hosts(
+        hass, [_host(device)], "doorbell", {"title": "Door"}, timeout=3
+    )
+
+    assert results[0]["outcome"] == OUTCOME_DELIVERED
+    assert results[0]["attempts"] == 1
+
+
+async def test_timeouts_are_not_retried(hass, fake_device):
+    device = await fake_device(latency_ms=1000)
+
+    results = await async_post_to_hosts(
+        hass, [_host(device)], "doorbell", {"title": "Door"}, timeout=0.5
+    )
+
+    assert results[0]["outcome"] == OUTCOME_FAILED
+    assert results[0]["error"] == "timeout"
+    assert results[0]["attempts"] == 1
+    assert device.request_counts["POST", "/doorbell"] == 1
+
+
+async def test_server_errors_are_retried_with_the_same_key(hass, fake_device):
+    device = await fake_device()
+    device.fail_next = 1
+    start_ms = int(time.time() * 1000)
+
+    results = await async_post_to_hosts(
+        hass, [_host(device)], "timer", {"seconds": 60, "startTime": start_ms}
+    )
+
+    assert results[0]["outcome"] == OUTCOME_DELIVERED
+    assert results[0]["attempts"] == 2
+    assert device.request_counts["POST", "/timer"] == 2
+    # startTime is shifted by the estimated clock offset, whole milliseconds
+    assert abs(device.end_ms - (start_ms + 60_000)) <= 2
+
+
+async def test_client_errors_are_not_retried(hass, fake_device):
+    device = await fake_device()
+    host = _host(device)
+
+    # The simulator does not serve this endpoint, so it answers 404
+    results = await async_post_to_hosts(hass, [host], "nope", {"title": "x"})
+
+    assert results[0]["outcome"] == OUTCOME_FAILED
+    assert results[0]["status"] == 404
+    assert results[0]["attempts"] == 1
+
+
+async def test_offline_device_is_reported_unreachable(hass, allow_sockets):
+    # Nothing listens on this port once the socket is closed
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    host = {
+        "device": TimerlyDevice("Timerly Gone TV", "127.0.0.1", port),
+        "online": False,
+    }
+
+    first = await async_post_to_hosts(hass, [host], "doorbell", {"title": "Door"})
+    second = await async_post_to_hosts(hass, [host], "doorbell", {"title": "Door"})
+
+    assert first[0]["outcome"] == OUTCOME_UNREACHABLE
+    assert first[0]["attempts"] == 0
+    # Not remembered as sent, so it can be queued or re-sent
+    assert second[0]["outcome"] == OUTCOME_UNREACHABLE
+
+
+async def test_end_time_is_shifted_onto_the_device_clock(hass, fake_device):
+    device = await fake_device(clock_skew_ms=4000)
+    host = _host(device)
+    connection = get_connection(hass, host["device"])
+    # Any exchange teaches the connection the device clock
+    await async_post_to_hosts(hass, [host], "doorbell", {"title": "Door"})
+    assert abs(connection.clock_offset_ms - 4000) < 50
+
+    end_ms = int(time.time() * 1000) + 60_000
+    results = await async_post_to_hosts(
+        hass, [host], "timer", {"seconds": 60, "endTime": end_ms}
+    )
+
+    assert results[0]["outcome"] == OUTCOME_DELIVERED
+    assert abs(device.end_ms - (end_ms + 4000)) < 50
+    assert device.properties["seconds"] in (59, 60)
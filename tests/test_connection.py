@@ -0,0 +1,84 @@
+"""Clock offset estimation in TimerlyConnection."""
+
+from email.utils import formatdate
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.timerly.connection import TimerlyConnection  # noqa: E402
+from custom_components.timerly.const import (  # noqa: E402
+    CLOCK_HEADER,
+    CLOCK_OFFSET_ALPHA,
+)
+from custom_components.timerly.TimerlyDevice import TimerlyDevice  # noqa: E402
+
+NOW_MS = 1_700_000_000_000
+
+
+@pytest.fixture
+def connection():
+    return TimerlyConnection(TimerlyDevice("Timerly Test TV", "127.0.0.1", 8181))
+
+
+def _precise(device_ms: float) -> dict:
+    return {CLOCK_HEADER: str(device_ms)}
+
+
+def _date(device_ms: float) -> dict:
+    return {"Date": formatdate(device_ms / 1000, usegmt=True)}
+
+
+def test_first_precise_sample_seeds_the_offset(connection):
+    # Stamped at the midpoint of a 20 ms exchange, 3 s ahead
+    connection.record_clock(NOW_MS, NOW_MS + 20, _precise(NOW_MS + 10 + 3000))
+
+    assert connection.clock_offset_ms == 3000
+    assert connection.rtt_ms == 20
+
+
+def test_later_samples_are_smoothed(connection):
+    connection.record_clock(NOW_MS, NOW_MS + 20, _precise(NOW_MS + 10 + 1000))
+    connection.record_clock(NOW_MS, NOW_MS + 20, _precise(NOW_MS + 10 + 2000))
+
+    assert connection.clock_offset_ms == pytest.approx(1000 + CLOCK_OFFSET_ALPHA * 1000)
+    assert connection.clock_samples == 2
+
+
+def test_slow_exchange_does_not_move_the_offset(connection):
+    connection.record_clock(NOW_MS, NOW_MS + 20, _precise(NOW_MS + 10 + 1000))
+    # Ten times the usual round trip: the midpoint says little
+    connection.record_clock(NOW_MS, NOW_MS + 200, _precise(NOW_MS + 100 + 5000))
+
+    assert connection.clock_offset_ms == 1000
+    assert connection.clock_samples == 1
+
+
+def test_date_header_keeps_a_correct_clock_at_zero(connection):
+    for i in range(5):
+        sent = NOW_MS + i * 1000 + 250
+        connection.record_clock(sent, sent + 20, _date(sent + 10))
+
+    assert connection.clock_offset_ms == 0
+
+
+def test_date_header_pulls_a_skewed_clock_into_its_window(connection):
+    sent = NOW_MS + 250
+    connection.record_clock(sent, sent + 20, _date(sent + 10 + 5000))
+
+    # Within the one-second resolution of the header
+    assert abs(connection.clock_offset_ms - 5000) < 1000
+
+
+def test_date_header_is_ignored_once_precise_samples_arrive(connection):
+    connection.record_clock(NOW_MS, NOW_MS + 20, _precise(NOW_MS + 10 + 1500))
+    connection.record_clock(NOW_MS, NOW_MS + 20, _date(NOW_MS - 60_000))
+
+    assert connection.clock_offset_ms == 1500
+
+
+def test_response_without_a_clock_is_ignored(connection):
+    connection.record_clock(NOW_MS, NOW_MS + 20, {})
+
+    assert connection.clock_samples == 0
+    assert connection.rtt_ms is None
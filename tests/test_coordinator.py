@@ -0,0 +1,157 @@
+"""TimerlyCoordinator against a simulated device."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_capture_events,
+)
+
+from custom_components.timerly.connection import (  # noqa: E402
+    async_close_connections,
+)
+from custom_components.timerly.const import (  # noqa: E402
+    DOMAIN,
+    SCHEDULER_JOB_TIMER_FINISHED,
+    TIMER_CANCEL_GRACE_SEC,
+)
+from custom_components.timerly.coordinator import TimerlyCoordinator  # noqa: E402
+from custom_components.timerly.TimerlyDevice import TimerlyDevice  # noqa: E402
+
+
+@pytest.fixture
+async def make_coordinator(hass, fake_device):
+    """Start a simulated device and a coordinator polling it."""
+    coordinators = []
+
+    async def _make(options: dict | None = None, **device_options):
+        entry = MockConfigEntry(domain=DOMAIN, options=options or {})
+        entry.add_to_hass(hass)
+        device = await fake_device(**device_options)
+        coordinator = TimerlyCoordinator(
+            hass,
+            TimerlyDevice(f"Timerly {device.name}", device.host, device.port),
+            entry,
+        )
+        coordinators.append(coordinator)
+        return coordinator, device
+
+    yield _make
+    for coordinator in coordinators:
+        coordinator.scheduler.cancel_all()
+        await coordinator.async_shutdown()
+    hass.data[DOMAIN].pop("scheduler").shutdown()
+    await async_close_connections(hass)
+
+
+@pytest.fixture
+def events(hass):
+    return {
+        name: async_capture_events(hass, f"timerly_timer_{name}")
+        for name in ("started", "stopped", "finished", "finish_retracted", "cancelled")
+    }
+
+
+async def _wait_for(events: list, count: int = 1, timeout: float = 2):
+    async with asyncio.timeout(timeout):
+        while len(events) < count:
+            await asyncio.sleep(0.02)
+
+
+async def test_finished_fires_at_end_time_and_poll_confirms(
+    hass, make_coordinator, events
+):
+    coordinator, device = await make_coordinator(timer_seconds=0.3)
+    end_ms = device.end_ms
+    await coordinator.async_refresh()
+    assert coordinator.scheduler.is_scheduled(SCHEDULER_JOB_TIMER_FINISHED)
+
+    await _wait_for(events["finished"])
+    finished = events["finished"][0]
+    assert finished.data["source"] == "scheduler"
+    assert finished.data["end_ms"] == end_ms
+    # On HA's clock, not early
+    assert finished.time_fired.timestamp() * 1000 >= end_ms - 5
+
+    # The next poll sees the timer gone: confirmed, not announced again
+    await coordinator.async_refresh()
+    assert len(events["stopped"]) == 1
+    assert len(events["finished"]) == 1
+    assert events["cancelled"] == []
+    assert events["finish_retracted"] == []
+
+
+async def test_missed_finish_is_announced_by_the_poll(hass, make_coordinator, events):
+    coordinator, device = await make_coordinator(timer_seconds=0.2)
+    await coordinator.async_refresh()
+    # As if HA had been busy or restarting when the timer ended
+    coordinator.scheduler.cancel(SCHEDULER_JOB_TIMER_FINISHED)
+    await asyncio.sleep(0.3)
+
+    await coordinator.async_refresh()
+
+    assert [e.data["source"] for e in events["finished"]] == ["poll"]
+    assert events["cancelled"] == []
+
+
+async def test_finish_is_retracted_when_device_still_runs(
+    hass, make_coordinator, events
+):
+    coordinator, device = await make_coordinator(timer_seconds=0.3)
+    await coordinator.async_refresh()
+    end_ms = coordinator.data["end_ms"]
+    # The TV's clock falls behind, so its timer runs on past HA's end time
+    device.clock_skew_ms = -2000
+    await _wait_for(events["finished"])
+
+    await coordinator.async_refresh()
+
+    assert coordinator.data["end_ms"] == end_ms
+    assert [e.data["end_ms"] for e in events["finish_retracted"]] == [end_ms]
+    # Not re-announced by the scheduler in the meantime
+    assert not coordinator.scheduler.is_scheduled(SCHEDULER_JOB_TIMER_FINISHED)
+
+    # Once the device really finishes, the poll announces it
+    await asyncio.sleep(2)
+    await coordinator.async_refresh()
+    assert [e.data["source"] for e in events["finished"]] == ["scheduler", "poll"]
+
+
+async def test_early_stop_is_a_cancel(hass, make_coordinator, events):
+    coordinator, device = await make_coordinator(timer_seconds=60)
+    await coordinator.async_refresh()
+
+    async with coordinator.connection.session.post(
+        coordinator.connection.url("cancel"), json={}
+    ) as response:
+        assert response.status == 200
+    await coordinator.async_refresh()
+
+    assert len(events["cancelled"]) == 1
+    assert events["cancelled"][0].data["remaining_ms"] > TIMER_CANCEL_GRACE_SEC * 1000
+    assert events["finished"] == []
+    assert not coordinator.scheduler.is_scheduled(SCHEDULER_JOB_TIMER_FINISHED)
+
+
+async def test_unchanged_timer_is_a_304_and_keeps_the_data(hass, make_coordinator):
+    coordinator, device = await make_coordinator(timer_seconds=60)
+    await coordinator.async_refresh()
+    data = coordinator.data
+
+    await coordinator.async_refresh()
+
+    assert device.not_modified == 1
+    assert coordinator.last_update_success
+    assert coordinator.data is data
+
+    # A change on the device is picked up with a full body again
+    device.properties = {"duration": 60, "type": "PASTA"}
+    device.version += 1
+    await coordinator.async_refresh()
+
+    assert device.not_modified == 1
+    assert coordinator.data["properties"]["type"] == "PASTA"
@@ -0,0 +1,167 @@
+"""TimerlyDeviceIndex.resolve_targets against the real registries."""
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.const import ENTITY_MATCH_ALL  # noqa: E402
+from homeassistant.helpers import (  # noqa: E402
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+    floor_registry as fr,
+)
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+)
+
+from custom_components.timerly.const import DOMAIN  # noqa: E402
+from custom_components.timerly.discovery import TimerlyDeviceIndex  # noqa: E402
+from custom_components.timerly.TimerlyDevice import TimerlyDevice  # noqa: E402
+
+
+def _register(hass, config_entry, name: str) -> tuple[dict, str, str]:
+    """Register a device and its timer entity the way the platforms do."""
+    device = TimerlyDevice(f"Timerly {name}", "127.0.0.1", 8181)
+    device_entry = dr.async_get(hass).async_get_or_create(
+        config_entry_id=config_entry.entry_id, identifiers={(DOMAIN, device.name)}
+    )
+    entity_entry = er.async_get(hass).async_get_or_create(
+        "binary_sensor",
+        DOMAIN,
+        device.unique_id,
+        config_entry=config_entry,
+        device_id=device_entry.id,
+    )
+    return {"device": device}, device_entry.id, entity_entry.entity_id
+
+
+@pytest.fixture
+def config_entry(hass):
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+async def index(hass):
+    index = TimerlyDeviceIndex(hass)
+    unsub = index.async_start()
+    yield index
+    unsub()
+
+
+def _names(hosts) -> list[str]:
+    return sorted(host["device"].name for host in hosts)
+
+
+async def test_no_selection_means_every_device(hass, config_entry, index):
+    host, _, _ = _register(hass, config_entry, "Kitchen TV")
+    index.async_add(host)
+
+    assert index.resolve_targets({}) is None
+    assert _names(index.resolve_targets({"entity_id": ENTITY_MATCH_ALL})) == [
+        "Kitchen TV"
+    ]
+
+
+async def test_entity_device_and_legacy_ids(hass, config_entry, index):
+    hosts = [_register(hass, config_entry, name) for name in ("Kitchen TV", "Den TV")]
+    for host, _, _ in hosts:
+        index.async_add(host)
+    (kitchen, kitchen_device_id, kitchen_entity_id), (den, _, _) = hosts
+
+    assert index.resolve_targets({"entity_id": kitchen_entity_id}) == [kitchen]
+    assert index.resolve_targets({"device_id": [kitchen_device_id]}) == [kitchen]
+    # Older automations target by device name or unique id
+    assert index.resolve_targets({"entity_id": "Den TV"}) == [den]
+    assert index.resolve_targets({"device_id": den["device"].unique_id}) == [den]
+    assert index.resolve_targets({"entity_id": "binary_sensor.nope"}) == []
+
+
+async def test_every_entity_of_a_device_resolves(hass, config_entry, index):
+    host, device_id, _ = _register(hass, config_entry, "Kitchen TV")
+    index.async_add(host)
+
+    # Sensors registered after the device was indexed
+    sensor = er.async_get(hass).async_get_or_create(
+        "sensor",
+        DOMAIN,
+        f"{host['device'].unique_id}_remaining",
+        config_entry=config_entry,
+        device_id=device_id,
+    )
+    await hass.async_block_till_done()
+
+    assert index.resolve_targets({"entity_id": sensor.entity_id}) == [host]
+
+    er.async_get(hass).async_remove(sensor.entity_id)
+    await hass.async_block_till_done()
+
+    assert index.resolve_targets({"entity_id": sensor.entity_id}) == []
+
+
+async def test_renamed_entity_keeps_resolving(hass, config_entry, index):
+    host, _, entity_id = _register(hass, config_entry, "Kitchen TV")
+    index.async_add(host)
+
+    er.async_get(hass).async_update_entity(
+        entity_id, new_entity_id="binary_sensor.cooking_timer"
+    )
+    await hass.async_block_till_done()
+
+    assert index.resolve_targets({"entity_id": "binary_sensor.cooking_timer"}) == [
+        host
+    ]
+    assert index.resolve_targets({"entity_id": entity_id}) == []
+
+
+async def test_area_floor_and_label(hass, config_entry, index):
+    floor = fr.async_get(hass).async_create("Ground floor")
+    kitchen_area = ar.async_get(hass).async_create("Kitchen", floor_id=floor.floor_id)
+    den_area = ar.async_get(hass).async_create("Den")
+    kitchen, kitchen_device_id, _ = _register(hass, config_entry, "Kitchen TV")
+    den, _, den_entity_id = _register(hass, config_entry, "Den TV")
+    dr.async_get(hass).async_update_device(kitchen_device_id, area_id=kitchen_area.id)
+    er.async_get(hass).async_update_entity(
+        den_entity_id, area_id=den_area.id, labels={"party"}
+    )
+    await hass.async_block_till_done()
+    index.async_add(kitchen)
+    index.async_add(den)
+
+    assert index.resolve_targets({"area_id": kitchen_area.id}) == [kitchen]
+    assert index.resolve_targets({"floor_id": floor.floor_id}) == [kitchen]
+    assert index.resolve_targets({"label_id": "party"}) == [den]
+    # Each device is returned once, however many selectors match it
+    assert _names(
+        index.resolve_targets(
+            {"area_id": [kitchen_area.id, den_area.id], "label_id": "party"}
+        )
+    ) == ["Den TV", "Kitchen TV"]
+
+
+async def test_moving_a_device_updates_its_area(hass, config_entry, index):
+    first = ar.async_get(hass).async_create("Kitchen")
+    second = ar.async_get(hass).async_create("Den")
+    host, device_id, _ = _register(hass, config_entry, "Kitchen TV")
+    dr.async_get(hass).async_update_device(device_id, area_id=first.id)
+    await hass.async_block_till_done()
+    index.async_add(host)
+
+    dr.async_get(hass).async_update_device(device_id, area_id=second.id)
+    await hass.async_block_till_done()
+
+    assert index.resolve_targets({"area_id": first.id}) == []
+    assert index.resolve_targets({"area_id": second.id}) == [host]
+
+
+async def test_removed_device_no_longer_resolves(hass, config_entry, index):
+    host, _, entity_id = _register(hass, config_entry, "Kitchen TV")
+    index.async_add(host)
+
+    index.async_remove("Kitchen TV")
+
+    assert index.resolve_targets({"entity_id": entity_id}) == []
+    assert index.resolve_targets({"entity_id": ENTITY_MATCH_ALL}) == []
+    assert len(index) == 0
@@ -0,0 +1,61 @@
+"""The timer entity's state as the coordinator updates."""
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.const import STATE_OFF, STATE_ON  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+
+from custom_components.timerly.const import DOMAIN  # noqa: E402
+
+
+@pytest.fixture
+async def timer(hass, setup_timerly, discover_device):
+    await setup_timerly()
+    device, coordinator = await discover_device(timer_seconds=60)
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "binary_sensor", DOMAIN, coordinator.device.unique_id
+    )
+    return device, coordinator, entity_id
+
+
+async def test_unchanged_poll_does_not_rewrite_the_state(hass, timer):
+    device, coordinator, entity_id = timer
+    state = hass.states.get(entity_id)
+    assert state.state == STATE_ON
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert device.not_modified == 1
+    assert hass.states.get(entity_id) is state
+    assert hass.states.get(entity_id).last_reported == state.last_reported
+
+
+async def test_changed_timer_is_written(hass, timer):
+    device, coordinator, entity_id = timer
+
+    async with coordinator.connection.session.post(
+        coordinator.connection.url("cancel"), json={}
+    ) as response:
+        assert response.status == 200
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == STATE_OFF
+
+
+async def test_device_properties_stay_under_one_attribute(hass, timer):
+    device, coordinator, entity_id = timer
+    device.properties = {"duration": 60, "type": "PASTA", "firmware_debug": "x" * 500}
+    device.version += 1
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    attributes = hass.states.get(entity_id).attributes
+    assert attributes["type"] == "PASTA"
+    assert attributes["duration"] == 60
+    assert "firmware_debug" not in attributes
+    assert attributes["properties"]["firmware_debug"] == "x" * 500
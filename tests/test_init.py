@@ -0,0 +1,78 @@
+"""Integration setup, unload and shutdown."""
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE  # noqa: E402
+from homeassistant.helpers import (  # noqa: E402
+    device_registry as dr,
+    entity_registry as er,
+)
+
+from custom_components.timerly import async_remove_config_entry_device  # noqa: E402
+from custom_components.timerly.connection import get_connection  # noqa: E402
+from custom_components.timerly.const import DOMAIN  # noqa: E402
+from custom_components.timerly.discovery import get_device_index  # noqa: E402
+from custom_components.timerly.TimerlyDevice import TimerlyDevice  # noqa: E402
+
+
+async def _open_session(hass, fake_device):
+    device = await fake_device()
+    connection = get_connection(
+        hass, TimerlyDevice(f"Timerly {device.name}", device.host, device.port)
+    )
+    async with connection.session.get(connection.url("timer")) as response:
+        assert response.status == 404
+    return connection.session
+
+
+async def test_device_sessions_close_on_shutdown(hass, setup_timerly, fake_device):
+    await setup_timerly()
+    session = await _open_session(hass, fake_device)
+
+    # Home Assistant does not unload config entries when it stops
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert session.closed
+    assert not hass.data[DOMAIN].get("connections")
+
+
+async def test_unload_closes_sessions_and_forgets_coordinators(
+    hass, setup_timerly, fake_device
+):
+    entry = await setup_timerly()
+    session = await _open_session(hass, fake_device)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+    assert session.closed
+    assert "coordinators" not in hass.data[DOMAIN]
+    assert "scheduler" not in hass.data[DOMAIN]
+
+
+async def test_deleted_device_is_forgotten(hass, setup_timerly, discover_device):
+    entry = await setup_timerly()
+    device, coordinator = await discover_device()
+    device_registry = dr.async_get(hass)
+    device_entry = device_registry.async_get_device(identifiers={(DOMAIN, "Test TV")})
+
+    assert await async_remove_config_entry_device(hass, entry, device_entry)
+    # What Home Assistant does once the integration allows the removal
+    device_registry.async_update_device(
+        device_entry.id, remove_config_entry_id=entry.entry_id
+    )
+    await hass.async_block_till_done()
+
+    assert "Test TV" not in hass.data[DOMAIN]["discovered"]
+    assert "Test TV" not in hass.data[DOMAIN]["coordinators"]
+    assert len(get_device_index()) == 0
+    assert er.async_entries_for_device(er.async_get(hass), device_entry.id) == []
+
+    # Announcing itself again brings the device and its entities back
+    await device.stop()
+    _, coordinator = await discover_device()
+    assert coordinator.data is not None
+    assert device_registry.async_get_device(identifiers={(DOMAIN, "Test TV")})
+    assert hass.states.get("binary_sensor.test_tv_timer") is not None
@@ -0,0 +1,173 @@
+"""Media relay: cache, shared downloads, live fan-out and playlists."""
+
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.timerly import media  # noqa: E402
+
+CHUNK = b"x" * 16 * 1024
+
+
+@pytest.fixture
+def small_budget(monkeypatch):
+    monkeypatch.setattr(media, "MEDIA_CACHE_MAX_ITEM_BYTES", 64 * 1024)
+    monkeypatch.setattr(media, "MEDIA_CACHE_MAX_BYTES", 256 * 1024)
+
+
+@pytest.fixture
+async def origin(allow_sockets):
+    """Upstream server; ``hits`` counts requests per path."""
+    hits = {}
+    # path -> (chunks, content type, send Content-Length)
+    routes = {
+        "/small.png": (2, "image/png", True),
+        "/snapshot.jpg": (2, "image/jpeg", False),
+        "/clip.mp4": (10, "video/mp4", True),
+        "/huge.mp4": (20, "video/mp4", True),
+        "/live.mjpg": (20, "multipart/x-mixed-replace; boundary=frame", False),
+    }
+
+    async def _body(request):
+        hits[request.path] = hits.get(request.path, 0) + 1
+        chunks, content_type, length = routes[request.path]
+        response = web.StreamResponse(headers={"Content-Type": content_type})
+        if length:
+            response.content_length = chunks * len(CHUNK)
+        else:
+            response.enable_chunked_encoding()
+        await response.prepare(request)
+        for _ in range(chunks):
+            await response.write(CHUNK)
+            await asyncio.sleep(0.005)
+        return response
+
+    async def _playlist(request):
+        return web.Response(
+            text="#EXTM3U\nsegment1.ts\n", content_type="application/vnd.apple.mpegurl"
+        )
+
+    app = web.Application()
+    for path in routes:
+        app.router.add_get(path, _body)
+    app.router.add_get("/playlist", _playlist)
+    server = TestServer(app)
+    await server.start_server()
+    server.hits = hits
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+async def relay(hass, allow_sockets):
+    relay = media.TimerlyMediaRelay(hass)
+    app = web.Application()
+
+    async def _serve(request):
+        return await relay.async_serve(request, request.match_info["token"])
+
+    app.router.add_get("/media/{token}", _serve)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    relay.client = client
+    yield relay
+    relay.shutdown()
+    await client.close()
+
+
+def _token(relay, origin, path: str) -> str:
+    token = f"token{path.replace('/', '_')}"
+    relay._media[token] = media._Media(str(origin.make_url(path)))
+    return token
+
+
+async def _get(relay, token: str, delay: float = 0) -> bytes:
+    await asyncio.sleep(delay)
+    response = await relay.client.get(f"/media/{token}")
+    assert response.status == 200
+    return await response.read()
+
+
+async def test_small_file_is_fetched_once_and_cached(relay, origin):
+    token = _token(relay, origin, "/small.png")
+
+    bodies = await asyncio.gather(*(_get(relay, token) for _ in range(3)))
+
+    assert bodies == [CHUNK * 2] * 3
+    assert origin.hits["/small.png"] == 1
+    assert relay.as_dict()["cached_bytes"] == len(CHUNK) * 2
+
+
+async def test_snapshot_without_length_is_cached_not_streamed(relay, origin):
+    token = _token(relay, origin, "/snapshot.jpg")
+
+    first = await _get(relay, token)
+    later = await _get(relay, token)
+
+    assert first == later == CHUNK * 2
+    assert origin.hits["/snapshot.jpg"] == 1
+    assert relay.as_dict()["live_streams"] == 0
+
+
+async def test_large_file_is_shared_then_released(relay, origin, small_budget):
+    token = _token(relay, origin, "/clip.mp4")
+
+    bodies = await asyncio.gather(*(_get(relay, token, i * 0.02) for i in range(3)))
+
+    assert bodies == [CHUNK * 10] * 3
+    assert origin.hits["/clip.mp4"] == 1
+    # Nobody is watching any more, so nothing is held
+    assert relay.as_dict()["cached_bytes"] == 0
+    assert relay.as_dict()["shared_downloads"] == 0
+
+
+async def test_file_over_the_budget_is_streamed_per_viewer(relay, origin, small_budget):
+    token = _token(relay, origin, "/huge.mp4")
+
+    bodies = await asyncio.gather(*(_get(relay, token) for _ in range(2)))
+
+    assert bodies == [CHUNK * 20] * 2
+    assert origin.hits["/huge.mp4"] == 2
+    assert relay.as_dict()["cached_bytes"] == 0
+
+
+async def test_live_stream_is_fanned_out_from_one_connection(relay, origin):
+    token = _token(relay, origin, "/live.mjpg")
+
+    bodies = await asyncio.gather(_get(relay, token), _get(relay, token, 0.01))
+
+    assert all(body and len(body) % len(CHUNK) == 0 for body in bodies)
+    assert origin.hits["/live.mjpg"] == 1
+
+
+async def test_playlist_redirects_to_the_origin(relay, origin):
+    token = _token(relay, origin, "/playlist")
+
+    response = await relay.client.get(f"/media/{token}", allow_redirects=False)
+
+    assert response.status == 302
+    assert response.headers["Location"] == str(origin.make_url("/playlist"))
+
+
+async def test_rewrite_skips_playlists_and_non_http(hass, relay, origin):
+    hass.config.internal_url = "http://192.168.1.2:8123"
+
+    payload = relay.async_rewrite(
+        {
+            "imageUri": str(origin.make_url("/small.png")),
+            "videoUri": "https://example.com/live/index.m3u8",
+            "audioUri": "file:///tmp/ding.mp3",
+        }
+    )
+
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert payload["imageUri"].startswith("http://192.168.1.2:8123/api/timerly/media/")
+    # Images are fetched straight away
+    assert origin.hits["/small.png"] == 1
+    assert payload["videoUri"] == "https://example.com/live/index.m3u8"
+    assert payload["audioUri"] == "file:///tmp/ding.mp3"
@@ -0,0 +1,115 @@
+"""Offline outbox: replacement rules, expiry and delivery on reconnect."""
+
+import time
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.timerly.connection import (  # noqa: E402
+    async_close_connections,
+)
+from custom_components.timerly.const import (  # noqa: E402
+    DOMAIN,
+    OUTBOX_MAX_PER_DEVICE,
+    OUTBOX_TTL_SEC,
+)
+from custom_components.timerly.outbox import TimerlyOutbox  # noqa: E402
+from custom_components.timerly.TimerlyDevice import TimerlyDevice  # noqa: E402
+
+
+@pytest.fixture
+async def outbox(hass):
+    outbox = TimerlyOutbox(hass)
+    await outbox.async_load()
+    return outbox
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+async def _reloaded(hass, outbox: TimerlyOutbox) -> TimerlyOutbox:
+    await outbox.async_save()
+    restored = TimerlyOutbox(hass)
+    await restored.async_load()
+    return restored
+
+
+async def test_newer_timer_replaces_the_queued_one(outbox):
+    outbox.async_enqueue("TV", "timer", {"seconds": 60, "startTime": _now_ms()})
+    outbox.async_enqueue("TV", "doorbell", {"title": "Door"})
+    outbox.async_enqueue("TV", "timer", {"seconds": 90, "startTime": _now_ms()})
+
+    pending = outbox.pending("TV")
+    assert [item["endpoint"] for item in pending] == ["doorbell", "timer"]
+    assert pending[1]["payload"]["seconds"] == 90
+
+
+async def test_cancel_all_drops_the_queued_timer(outbox):
+    outbox.async_enqueue("TV", "timer", {"seconds": 60, "startTime": _now_ms()})
+    outbox.async_enqueue("TV", "cancel", {})
+
+    assert [item["endpoint"] for item in outbox.pending("TV")] == ["cancel"]
+
+
+async def test_named_cancel_keeps_the_queued_timer(outbox):
+    outbox.async_enqueue("TV", "timer", {"seconds": 60, "startTime": _now_ms()})
+    outbox.async_enqueue("TV", "cancel", {"name": "Pasta"})
+
+    assert [item["endpoint"] for item in outbox.pending("TV")] == ["timer", "cancel"]
+
+
+async def test_queue_keeps_only_the_newest_commands(outbox):
+    for i in range(OUTBOX_MAX_PER_DEVICE + 5):
+        outbox.async_enqueue("TV", "alert", {"title": str(i)})
+
+    pending = outbox.pending("TV")
+    assert len(pending) == OUTBOX_MAX_PER_DEVICE
+    assert pending[-1]["payload"]["title"] == str(OUTBOX_MAX_PER_DEVICE + 4)
+
+
+async def test_queue_survives_a_restart(hass, outbox):
+    outbox.async_enqueue("TV", "alert", {"title": "Oven"})
+
+    restored = await _reloaded(hass, outbox)
+
+    assert [item["payload"] for item in restored.pending("TV")] == [{"title": "Oven"}]
+
+
+async def test_expired_commands_are_dropped(hass, outbox, freezer):
+    outbox.async_enqueue("TV", "doorbell", {"title": "Door"})
+    outbox.async_enqueue("TV", "alert", {"title": "Oven"})
+    outbox.async_enqueue("TV", "timer", {"seconds": 120, "startTime": _now_ms()})
+
+    freezer.tick(OUTBOX_TTL_SEC["doorbell"] + 1)
+    restored = await _reloaded(hass, outbox)
+    assert [item["endpoint"] for item in restored.pending("TV")] == ["alert", "timer"]
+
+    # A queued timer is only worth delivering until it would have ended
+    freezer.tick(120)
+    restored = await _reloaded(hass, restored)
+    assert [item["endpoint"] for item in restored.pending("TV")] == ["alert"]
+
+    freezer.tick(OUTBOX_TTL_SEC["alert"])
+    restored = await _reloaded(hass, restored)
+    assert len(restored) == 0
+
+
+async def test_drain_delivers_the_remaining_time(hass, outbox, fake_device):
+    device = await fake_device()
+    host = {"device": TimerlyDevice(f"Timerly {device.name}", device.host, device.port)}
+    hass.data[DOMAIN] = {"discovered": {"Test TV": host}}
+    outbox.async_enqueue(
+        "Test TV", "timer", {"seconds": 60, "startTime": _now_ms() - 20_000}
+    )
+    outbox.async_enqueue("Test TV", "alert", {"title": "Oven"})
+
+    outbox.async_drain("Test TV")
+    await hass.async_block_till_done(wait_background_tasks=True)
+    await async_close_connections(hass)
+
+    assert outbox.pending("Test TV") == []
+    assert device.request_counts["POST", "/timer"] == 1
+    assert device.request_counts["POST", "/alert"] == 1
+    assert device.properties["seconds"] in (39, 40)
@@ -0,0 +1,54 @@
+"""Push updates: the webhook and the device subscription."""
+
+import time
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.timerly.const import CONF_PUSH  # noqa: E402
+from custom_components.timerly.push import get_webhook_id  # noqa: E402
+
+
+@pytest.fixture
+async def pushed(setup_timerly, discover_device):
+    """A push-enabled entry with one simulated device and its coordinator."""
+    entry = await setup_timerly(options={CONF_PUSH: True})
+    device, coordinator = await discover_device()
+    return entry, device, coordinator
+
+
+async def test_webhook_feeds_the_device_coordinator(hass, hass_client_no_auth, pushed):
+    entry, device, coordinator = pushed
+    client = await hass_client_no_auth()
+    url = f"/api/webhook/{get_webhook_id(entry)}"
+    end_ms = int(time.time() * 1000) + 60_000
+
+    resp = await client.post(
+        url, json={"name": "Timerly Test TV", "endTime": end_ms, "properties": {}}
+    )
+    assert resp.status == 200
+    assert coordinator.data["end_ms"] == end_ms
+
+    # A push without a name is matched by the sender's address
+    resp = await client.post(url, json={})
+    assert resp.status == 200
+    assert coordinator.data["end_ms"] is None
+
+    resp = await client.post(url, data="not json")
+    assert resp.status == 400
+
+
+async def test_failed_poll_resubscribes(hass, pushed):
+    _, device, coordinator = pushed
+    assert coordinator.push_subscribed
+    assert device.request_counts["POST", "/subscribe"] == 1
+
+    device.fail_next = 1
+    await coordinator.async_refresh()
+    assert not coordinator.push_subscribed
+
+    # The TV may have rebooted and forgotten us: the next good poll asks again
+    await coordinator.async_refresh()
+    assert coordinator.push_subscribed
+    assert device.request_counts["POST", "/subscribe"] == 2
@@ -0,0 +1,145 @@
+"""TimerlyScheduler: one shared heap for every device's timed jobs."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from bench_scheduler import _load_scheduler
+import pytest
+
+TimerlyScheduler = _load_scheduler()
+
+
+def _in(seconds: float) -> datetime:
+    return datetime.now(UTC) + timedelta(seconds=seconds)
+
+
+@pytest.fixture
+async def scheduler():
+    scheduler = TimerlyScheduler(asyncio.get_running_loop(), tolerance=0.01)
+    yield scheduler
+    scheduler.shutdown()
+
+
+async def test_jobs_run_in_due_order_and_never_early(scheduler):
+    loop = asyncio.get_running_loop()
+    ran = []
+    due = {}
+    for key, delay in (("c", 0.06), ("a", 0.02), ("b", 0.04)):
+        due[key] = loop.time() + delay
+        scheduler.schedule(key, _in(delay), lambda key=key: ran.append((key, loop.time())))
+
+    await asyncio.sleep(0.15)
+
+    assert [key for key, _ in ran] == ["a", "b", "c"]
+    for key, ran_at in ran:
+        assert ran_at >= due[key] - 0.002
+    assert len(scheduler) == 0
+
+
+async def test_job_waits_for_a_wall_clock_stepped_back(scheduler, monkeypatch):
+    class _SteppedBack(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) - timedelta(seconds=0.2)
+
+    ran = []
+    due = _in(0.02)
+    scheduler.schedule("tick", due, lambda: ran.append(datetime.now(UTC)))
+    # NTP steps the clock back after the job was armed on the loop clock
+    monkeypatch.setitem(TimerlyScheduler.schedule.__globals__, "datetime", _SteppedBack)
+
+    await asyncio.sleep(0.1)
+    assert ran == []
+    assert scheduler.is_scheduled("tick")
+
+    await asyncio.sleep(0.25)
+    assert len(ran) == 1
+    assert ran[0] - timedelta(seconds=0.2) >= due
+
+
+async def test_jobs_within_tolerance_share_one_wakeup():
+    scheduler = TimerlyScheduler(asyncio.get_running_loop(), tolerance=0.05)
+    ran = []
+    for i in range(5):
+        scheduler.schedule(i, _in(0.01 + i * 0.005), lambda i=i: ran.append(i))
+
+    await asyncio.sleep(0.15)
+
+    assert sorted(ran) == [0, 1, 2, 3, 4]
+    assert scheduler.wakeups == 1
+    assert scheduler.jobs_run == 5
+
+
+async def test_rescheduling_a_key_replaces_the_job(scheduler):
+    ran = []
+    scheduler.schedule("tick", _in(0.01), lambda: ran.append("first"))
+    scheduler.schedule("tick", _in(0.03), lambda: ran.append("second"))
+    assert len(scheduler) == 1
+
+    await asyncio.sleep(0.1)
+
+    assert ran == ["second"]
+
+
+async def test_cancelled_job_does_not_run(scheduler):
+    ran = []
+    scheduler.schedule("tick", _in(0.01), lambda: ran.append("tick"))
+    assert scheduler.is_scheduled("tick")
+
+    assert scheduler.cancel("tick")
+    assert not scheduler.cancel("tick")
+    await asyncio.sleep(0.05)
+
+    assert ran == []
+    assert not scheduler.is_scheduled("tick")
+
+
+async def test_coroutine_results_are_handed_to_create_task():
+    tasks = []
+    loop = asyncio.get_running_loop()
+    scheduler = TimerlyScheduler(
+        loop, tolerance=0.01, create_task=lambda coro: tasks.append(loop.create_task(coro))
+    )
+    done = asyncio.Event()
+
+    async def _job():
+        done.set()
+
+    scheduler.schedule("refresh", _in(0.01), _job)
+    await asyncio.wait_for(done.wait(), 1)
+
+    assert len(tasks) == 1
+
+
+async def test_failing_job_does_not_stop_the_others(scheduler):
+    ran = []
+
+    def _boom():
+        raise RuntimeError("boom")
+
+    scheduler.schedule("bad", _in(0.01), _boom)
+    scheduler.schedule("good", _in(0.01), lambda: ran.append("good"))
+    await asyncio.sleep(0.05)
+
+    assert ran == ["good"]
+    assert scheduler.jobs_run == 2
+
+
+async def test_past_due_job_runs_on_next_wakeup(scheduler):
+    ran = []
+    scheduler.schedule("late", _in(-5), lambda: ran.append("late"))
+
+    await asyncio.sleep(0.05)
+
+    assert ran == ["late"]
+
+
+async def test_shutdown_drops_pending_jobs(scheduler):
+    ran = []
+    scheduler.schedule("tick", _in(0.01), lambda: ran.append("tick"))
+
+    scheduler.shutdown()
+    await asyncio.sleep(0.05)
+
+    assert ran == []
+    assert len(scheduler) == 0
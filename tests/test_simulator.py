@@ -0,0 +1,122 @@
+"""The simulator's HTTP contract, which the other tests and the benches rely on."""
+
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+
+@pytest.fixture
+async def session(allow_sockets):
+    async with aiohttp.ClientSession() as session:
+        yield session
+
+
+def _url(device, endpoint: str) -> str:
+    return f"http://{device.host}:{device.port}/{endpoint}"
+
+
+async def test_timer_etag_answers_304_until_the_timer_changes(fake_device, session):
+    device = await fake_device(timer_seconds=60)
+
+    async with session.get(_url(device, "timer")) as resp:
+        assert resp.status == 200
+        etag = resp.headers["ETag"]
+        assert (await resp.json())["name"] == "Timerly Test TV"
+
+    async with session.get(
+        _url(device, "timer"), headers={"If-None-Match": etag}
+    ) as resp:
+        assert resp.status == 304
+    assert device.not_modified == 1
+
+    async with session.post(_url(device, "cancel"), json={}) as resp:
+        assert resp.status == 200
+    async with session.get(
+        _url(device, "timer"), headers={"If-None-Match": etag}
+    ) as resp:
+        assert resp.status == 404
+        assert resp.headers["ETag"] != etag
+
+
+async def test_retried_command_is_acknowledged_but_not_reapplied(fake_device, session):
+    device = await fake_device()
+    headers = {"Idempotency-Key": "abc"}
+
+    async with session.post(
+        _url(device, "timer"), json={"seconds": 60}, headers=headers
+    ) as resp:
+        assert resp.status == 200
+    first_end = device.end_ms
+    version = device.version
+
+    async with session.post(
+        _url(device, "timer"), json={"seconds": 600}, headers=headers
+    ) as resp:
+        assert resp.status == 200
+
+    assert device.end_ms == first_end
+    assert device.version == version
+    assert device.replayed_commands == 1
+
+
+async def test_fail_next_returns_503_then_recovers(fake_device, session):
+    device = await fake_device()
+    device.fail_next = 1
+
+    async with session.post(_url(device, "doorbell"), json={}) as resp:
+        assert resp.status == 503
+    async with session.post(_url(device, "doorbell"), json={}) as resp:
+        assert resp.status == 200
+
+
+async def test_end_time_wins_over_seconds(fake_device, session):
+    device = await fake_device()
+    end_ms = int(time.time() * 1000) + 90_000
+
+    async with session.post(
+        _url(device, "timer"), json={"seconds": 5, "endTime": end_ms}
+    ) as resp:
+        assert resp.status == 200
+
+    assert device.end_ms == end_ms
+
+
+async def test_clock_header_reports_the_skewed_device_clock(fake_device, session):
+    device = await fake_device(clock_skew_ms=5000)
+
+    sent_ms = time.time() * 1000
+    async with session.get(_url(device, "timer")) as resp:
+        received_ms = time.time() * 1000
+        device_ms = float(resp.headers["X-Timerly-Time"])
+
+    assert sent_ms + 5000 - 1 <= device_ms <= received_ms + 5000
+
+
+async def test_expiring_timer_is_pushed_to_subscribers(fake_device, session):
+    pushes = asyncio.Queue()
+
+    async def _receive(request):
+        await pushes.put(await request.json())
+        return web.Response(status=200)
+
+    app = web.Application()
+    app.router.add_post("/push", _receive)
+    async with TestServer(app) as server:
+        device = await fake_device()
+        async with session.post(
+            _url(device, "subscribe"), json={"url": str(server.make_url("/push"))}
+        ) as resp:
+            assert resp.status == 200
+        async with session.post(_url(device, "timer"), json={"seconds": 0.2}) as resp:
+            assert resp.status == 200
+        assert "endTime" in await asyncio.wait_for(pushes.get(), 1)
+
+        # Nobody polls: the device pushes the timer running out by itself
+        expired = await asyncio.wait_for(pushes.get(), 1)
+
+    assert expired == {"name": "Timerly Test TV"}
+    assert device.end_ms is None